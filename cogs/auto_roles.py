@@ -1,29 +1,62 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
-import json
+import asyncio
+import itertools
+import time
 
 from utils.logger import log_action
+from utils.role_queue import role_queue
+from utils.settings_store import settings_store
 
 SETTINGS_PATH = "data/settings/autorole.json"
+CONFIG_PATH = "data/config.json"  # "join_workers" / "join_queue_size" override the defaults below
+JOIN_WORKERS = 4
+JOIN_QUEUE_SIZE = 1000
+MAX_PENDING_GRANTS = 100  # grants handed to the role queue and not applied yet; workers wait beyond this
+SUMMARY_WINDOW = 5.0  # seconds of grants summarized in one log entry
+SUMMARY_MENTIONS = 20
+
+PRIORITY_VERIFIED = 0  # members who just verified or finished membership screening
+PRIORITY_JOIN = 1
 
 def load_config():
-    if not os.path.exists(SETTINGS_PATH):
-        os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
-        with open(SETTINGS_PATH, "w") as f:
-            json.dump({}, f)
-    with open(SETTINGS_PATH, "r") as f:
-        return json.load(f)
+    return settings_store.load(SETTINGS_PATH, {})
 
 def save_config(data):
-    with open(SETTINGS_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+    settings_store.save(SETTINGS_PATH, data)
 
 class AutoRoles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.config = load_config()
+        bot_config = settings_store.load(CONFIG_PATH, {})
+        self.worker_count = int(bot_config.get("join_workers", JOIN_WORKERS))
+        self.queue = asyncio.PriorityQueue(maxsize=int(bot_config.get("join_queue_size", JOIN_QUEUE_SIZE)))
+        self.queued = {}     # (guild_id, member_id): best priority waiting in the queue
+        self.seq = itertools.count()
+        self.workers = []
+        self.grants = {}     # (guild_id, member_id): role queue future for a pending grant
+        self.revokes = set() # role queue futures taking auto-roles back from raid joins
+        self.grant_slots = asyncio.Semaphore(MAX_PENDING_GRANTS)
+        self.summaries = {}  # guild_id: [(member, roles)] waiting for the batch log
+        self.summary_timers = {}
+        self.processed = 0
+        self.failed = 0
+        self.peak = 0
+        self.dequeued = 0
+        self.wait_total = 0.0
+
+    async def cog_load(self):
+        self.workers = [asyncio.create_task(self.worker()) for _ in range(self.worker_count)]
+
+    async def cog_unload(self):
+        for task in self.workers:
+            task.cancel()
+        for future in list(self.grants.values()):
+            future.cancel()
+        for task in self.summary_timers.values():
+            task.cancel()
 
     @app_commands.command(name="setautoroles", description="Set 3 roles to automatically assign to new members")
     @app_commands.checks.has_permissions(administrator=True)
@@ -45,39 +78,162 @@ class AutoRoles(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
-        guild_id = str(member.guild.id)
-        role_ids = self.config.get(guild_id, [])
+        # During a join raid lockdown roles are held; the raid guard releases them afterwards
+        raid_guard = self.bot.get_cog("RaidGuard")
+        if raid_guard and raid_guard.screen(member):
+            return
+        if self.config.get(str(member.guild.id)):
+            # Waits only while the queue is full; role edits happen in the workers
+            await self.enqueue(member, PRIORITY_JOIN)
 
-        if not role_ids:
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.pending and not after.pending:
+            self.prioritize(after)
+
+    def prioritize(self, member: discord.Member):
+        """Move a member who just verified to the front if their join is still queued."""
+        key = (member.guild.id, member.id)
+        if self.queued.get(key, PRIORITY_VERIFIED) <= PRIORITY_VERIFIED:
             return
+        try:
+            self.queue.put_nowait((PRIORITY_VERIFIED, next(self.seq), time.monotonic(), member))
+        except asyncio.QueueFull:
+            return  # the normal-priority entry is still queued
+        self.queued[key] = PRIORITY_VERIFIED
+
+    def withdraw(self, member: discord.Member):
+        """Take a member's auto-roles back: drop a queued join, cancel a pending grant, undo an applied one."""
+        key = (member.guild.id, member.id)
+        self.queued.pop(key, None)  # the worker skips the entry as stale
+        granting = self.grants.pop(key, None) is not None
 
-        roles = [member.guild.get_role(rid) for rid in role_ids]
-        roles = [r for r in roles if r is not None]
+        roles = self.roles_for(member.guild)
+        member = member.guild.get_member(member.id) or member
+        if not roles or not (granting or any(role in member.roles for role in roles)):
+            return
+
+        # Submitted synchronously: a grant still in the role queue's window is merged away,
+        # one already in flight is followed by this removal
+        future = role_queue.submit(member, remove=roles, source="raidguard", reason="Join raid: auto-roles held")
+        self.revokes.add(future)
+        future.add_done_callback(lambda future: self.revoked(member, future))
+
+    def revoked(self, member: discord.Member, future: asyncio.Future):
+        self.revokes.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"❌ Failed to take auto-roles back from {member.display_name}: {error}")
+
+    def roles_for(self, guild: discord.Guild):
+        roles = [guild.get_role(rid) for rid in self.config.get(str(guild.id), [])]
+        return [r for r in roles if r is not None]
+
+    async def enqueue(self, member: discord.Member, priority: int):
+        key = (member.guild.id, member.id)
+        if self.queued.get(key, priority + 1) <= priority:
+            return
+        self.queued[key] = priority
+        await self.queue.put((priority, next(self.seq), time.monotonic(), member))
+        self.peak = max(self.peak, self.queue.qsize())
 
+    async def worker(self):
+        while True:
+            priority, _, queued_at, member = await self.queue.get()
+            try:
+                key = (member.guild.id, member.id)
+                if self.queued.get(key) != priority:
+                    continue  # superseded by a higher-priority entry
+                del self.queued[key]
+                self.dequeued += 1
+                self.wait_total += time.monotonic() - queued_at
+                await self.assign(member)
+            finally:
+                self.queue.task_done()
+
+    async def assign(self, member: discord.Member):
+        if member.guild.get_member(member.id) is None:
+            return  # left before their turn
+
+        roles = self.roles_for(member.guild)
         if not roles:
             return
 
-        try:
-            await member.add_roles(*roles, reason="Auto role on join")
-        except discord.Forbidden:
+        # Hand the grant to the role queue and move on; waiting out its merge window
+        # here would cap throughput at one member per worker per window
+        await self.grant_slots.acquire()
+
+        # A lockdown may have started while this worker waited for a slot
+        raid_guard = self.bot.get_cog("RaidGuard")
+        if raid_guard and raid_guard.is_held(member):
+            self.grant_slots.release()
+            return
+
+        key = (member.guild.id, member.id)
+        future = self.grants[key] = role_queue.submit(member, add=roles, source="autorole", reason="Auto role on join")
+        future.add_done_callback(lambda future: self.granted(key, member, roles, future))
+
+    def granted(self, key, member: discord.Member, roles, future: asyncio.Future):
+        self.grant_slots.release()
+        error = None if future.cancelled() else future.exception()
+        if self.grants.get(key) is not future:
+            return  # withdrawn by the raid guard
+        del self.grants[key]
+        if future.cancelled():
+            return
+
+        if isinstance(error, discord.Forbidden):
+            self.failed += 1
             print(f"❌ Missing permission to add roles to {member.display_name}")
             return
-        except Exception as e:
-            print(f"❌ Failed to add auto-roles to {member.display_name}: {e}")
+        if error is not None:
+            self.failed += 1
+            print(f"❌ Failed to add auto-roles to {member.display_name}: {error}")
             return
 
-        # 🔁 Log the auto-role assignment
+        self.processed += 1
+        self.summaries.setdefault(member.guild.id, []).append((member, roles))
+        if member.guild.id not in self.summary_timers:
+            self.summary_timers[member.guild.id] = asyncio.create_task(self.log_summary_later(member.guild))
+
+    async def log_summary_later(self, guild: discord.Guild):
+        await asyncio.sleep(SUMMARY_WINDOW)
+        self.summary_timers.pop(guild.id, None)
+        batch = self.summaries.pop(guild.id, [])
+        if not batch:
+            return
+
+        # 🔁 One log entry per batch instead of one per join
+        roles = list({role.id: role for _, granted in batch for role in granted}.values())
+        mentions = ", ".join(member.mention for member, _ in batch[:SUMMARY_MENTIONS])
+        if len(batch) > SUMMARY_MENTIONS:
+            mentions += f" and {len(batch) - SUMMARY_MENTIONS} more"
         try:
             await log_action(
                 self.bot,
-                member.guild,
-                title="👥 Auto Role Assigned",
-                content=f"{member.mention} joined and was automatically given roles: " +
-                        ", ".join(r.mention for r in roles),
-                user=member
+                guild,
+                title="👥 Auto Roles Assigned",
+                content=(
+                    f"**{len(batch)} member(s) auto-roled** with " + ", ".join(r.mention for r in roles) +
+                    f"\n{mentions}"
+                ),
+                user=batch[0][0] if len(batch) == 1 else None
             )
         except Exception as e:
-            print(f"⚠️ Failed to log auto-role for {member.name}: {e}")
+            print(f"⚠️ Failed to log auto-roles for {guild.name}: {e}")
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "peak": self.peak,
+            "workers": self.worker_count,
+            "granting": len(self.grants),
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait": self.wait_total / self.dequeued if self.dequeued else 0.0,
+        }
 
 async def setup(bot):
     await bot.add_cog(AutoRoles(bot))
@@ -1,30 +1,30 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
 import time
 
+from utils.pipeline import get_pipeline
+from utils.policy import id_set
+from utils.settings_store import settings_store
+
 CONFIG_PATH = "data/settings/auto_thread.json"
 
 def load_enabled_channels():
-    if not os.path.exists(CONFIG_PATH):
-        os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-        with open(CONFIG_PATH, "w") as f:
-            json.dump([], f)
-    with open(CONFIG_PATH, "r") as f:
-        return json.load(f)
+    return settings_store.load(CONFIG_PATH, [])
 
 def save_enabled_channels(data):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+    settings_store.save(CONFIG_PATH, data)
 
 class AutoThread(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.enabled_channels = load_enabled_channels()
+        self.compile_policy()
         self.user_cooldowns = {}  # Format: {channel_id: {user_id: last_timestamp}}
 
+    def compile_policy(self, settings=None):
+        self.enabled_ids = id_set(self.enabled_channels)
+
     @app_commands.command(name="enableautothread", description="Enable auto-thread in this channel")
     async def enable_autothread(self, interaction: discord.Interaction):
         if not interaction.user.guild_permissions.manage_channels:
@@ -36,6 +36,7 @@ class AutoThread(commands.Cog):
 
         self.enabled_channels.append(cid)
         save_enabled_channels(self.enabled_channels)
+        self.compile_policy()
         await interaction.response.send_message("✅ Auto-thread enabled in this channel.", ephemeral=True)
 
     @app_commands.command(name="disableautothread", description="Disable auto-thread in this channel")
@@ -49,17 +50,23 @@ class AutoThread(commands.Cog):
 
         self.enabled_channels.remove(cid)
         save_enabled_channels(self.enabled_channels)
+        self.compile_policy()
         await interaction.response.send_message("✅ Auto-thread disabled in this channel.", ephemeral=True)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot or message.guild is None:
-            return
+    async def cog_load(self):
+        get_pipeline(self.bot).register("auto_thread", self.moderate)
+        settings_store.subscribe(CONFIG_PATH, self.compile_policy)
 
+    async def cog_unload(self):
+        get_pipeline(self.bot).unregister("auto_thread")
+        settings_store.unsubscribe(CONFIG_PATH, self.compile_policy)
+
+    async def moderate(self, ctx):
+        message = ctx.message
         cid = message.channel.id
         uid = message.author.id
 
-        if cid not in self.enabled_channels:
+        if cid not in self.enabled_ids:
             return
 
         # Skip if message is in a thread
@@ -1,91 +1,133 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
-import json
-import re
+import copy
+from typing import NamedTuple
 
+from utils.guild_config import IDLE_TTL, MAX_LOADED_GUILDS, GuildConfig
 from utils.logger import log_action  # ✅ Log system integration
+from utils.pipeline import get_pipeline
+from utils.policy import id_set
+from utils.settings_store import settings_store
+from utils.text_normalize import normalize, normalize_with_offsets, original_span
+from utils.ttl_cache import TTLCache
+from utils.word_matcher import WordMatcher
 
-SETTINGS_PATH = "data/settings/badwords.json"
+SETTINGS_PATH = "data/settings/badwords.json"  # old process-wide list; template for new guilds
+GUILD_DEFAULTS = {"words": [], "ignored_channels": []}
 
-def load_settings():
-    os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
-    if not os.path.exists(SETTINGS_PATH):
-        with open(SETTINGS_PATH, "w") as f:
-            json.dump({"words": [], "ignored_channels": []}, f)
-    with open(SETTINGS_PATH, "r") as f:
-        return json.load(f)
+class BadWordPolicy(NamedTuple):
+    matcher: WordMatcher
+    ignored_channels: frozenset  # int channel ids
 
-def save_settings(settings):
-    with open(SETTINGS_PATH, "w") as f:
-        json.dump(settings, f, indent=4)
+def load_settings():
+    return settings_store.load(SETTINGS_PATH, GUILD_DEFAULTS)
+
+def legacy_guild_settings():
+    """Guilds seen for the first time inherit what used to be the global word list."""
+    data = copy.deepcopy(GUILD_DEFAULTS)
+    data.update(copy.deepcopy(load_settings()))
+    return data
+
+guild_settings = GuildConfig("badwords", GUILD_DEFAULTS, seed=legacy_guild_settings)
+
+def compile_policy(settings: dict) -> BadWordPolicy:
+    """Compile the word list once so each message is scanned in a single pass."""
+    words = [normalize(word) for word in settings.get("words", [])]
+    return BadWordPolicy(
+        WordMatcher(words, allow_repeats=True),
+        id_set(settings.get("ignored_channels", []))
+    )
+
+def find_bad_words(matcher: WordMatcher, content: str, normalized: str):
+    """Return [(word, original text)] so logs show what the user actually typed."""
+    _, offsets = normalize_with_offsets(content)
+    found = []
+    for word, start, end in matcher.iter_matches(normalized):
+        if all(word != w for w, _ in found):
+            found.append((word, original_span(content, start, end, offsets)))
+    return found
 
 class BadWordFilter(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.settings = load_settings()
-
-    def reload_settings(self):
-        """🔁 Reload bad word settings from disk (used by /reloadsettings)"""
-        self.settings = load_settings()
-
-    def contains_bad_word(self, message: str):
-        for word in self.settings["words"]:
-            pattern = re.compile(re.escape(word), re.IGNORECASE)
-            if pattern.search(message):
-                return True
-        return False
-
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot or not message.guild:
-            return
-
-        if str(message.channel.id) in self.settings.get("ignored_channels", []):
+        self.guild_settings = guild_settings
+        self.policies = TTLCache(max_entries=MAX_LOADED_GUILDS, ttl=IDLE_TTL)  # guild_id: BadWordPolicy
+
+    def get_policy(self, guild_id: int) -> BadWordPolicy:
+        policy = self.policies.get(guild_id)
+        if policy is None:
+            policy = compile_policy(self.guild_settings.get(guild_id))
+            self.policies.set(guild_id, policy)
+        return policy
+
+    def settings_changed(self, guild_id: int):
+        """Drop a guild's compiled policy; the next message recompiles it."""
+        self.policies.pop(guild_id)
+
+    def save_guild(self, guild_id: int):
+        self.guild_settings.save(guild_id)
+        self.settings_changed(guild_id)
+
+    async def cog_load(self):
+        get_pipeline(self.bot).register("bad_word_filter", self.moderate)
+        self.guild_settings.subscribe(self.settings_changed)
+
+    async def cog_unload(self):
+        get_pipeline(self.bot).unregister("bad_word_filter")
+        self.guild_settings.unsubscribe(self.settings_changed)
+
+    async def moderate(self, ctx):
+        message = ctx.message
+        policy = self.get_policy(message.guild.id)
+        if message.channel.id in policy.ignored_channels:
             return
 
-        if self.contains_bad_word(message.content):
-            try:
-                await message.delete()
-
-                # ✅ Log the deleted message
-                await log_action(
-                    self.bot,
-                    message.guild,
-                    title="Bad Word Detected",
-                    content=f"🚫 **Message by {message.author.mention} deleted in {message.channel.mention}**\n{message.content}",
-                    user=message.author
-                )
-
-            except discord.Forbidden:
-                pass
+        if policy.matcher.search(ctx.normalized):
+            matched = find_bad_words(policy.matcher, ctx.content, ctx.normalized)
+            if not await ctx.delete():
+                return
+
+            # ✅ Log the deleted message
+            await log_action(
+                self.bot,
+                message.guild,
+                title="Bad Word Detected",
+                content=(
+                    f"🚫 **Message by {message.author.mention} deleted in {message.channel.mention}**\n"
+                    f"**Matched:** {', '.join(f'`{word}` (`{typed}`)' for word, typed in matched)}\n{message.content}"
+                ),
+                user=message.author
+            )
 
     @app_commands.command(name="addbadword", description="Add a new word to the bad word list")
     async def addbadword(self, interaction: discord.Interaction, word: str):
+        settings = self.guild_settings.get(interaction.guild.id)
         word = word.lower()
-        if word in self.settings["words"]:
+        if word in settings["words"]:
             await interaction.response.send_message("⚠️ That word is already in the list.", ephemeral=True)
             return
 
-        self.settings["words"].append(word)
-        save_settings(self.settings)
+        settings["words"].append(word)
+        self.save_guild(interaction.guild.id)
         await interaction.response.send_message(f"✅ `{word}` has been added to the bad word list.", ephemeral=True)
 
     @app_commands.command(name="removebadword", description="Remove a word from the bad word list")
     async def removebadword(self, interaction: discord.Interaction, word: str):
+        settings = self.guild_settings.get(interaction.guild.id)
         word = word.lower()
-        if word not in self.settings["words"]:
+        if word not in settings["words"]:
             await interaction.response.send_message("⚠️ That word is not in the list.", ephemeral=True)
             return
 
-        self.settings["words"].remove(word)
-        save_settings(self.settings)
+        settings["words"].remove(word)
+        self.save_guild(interaction.guild.id)
         await interaction.response.send_message(f"✅ `{word}` has been removed from the list.", ephemeral=True)
 
     @app_commands.command(name="listbadwords", description="Show all current bad words")
     async def listbadwords(self, interaction: discord.Interaction):
-        words = self.settings.get("words", [])
+        settings = self.guild_settings.get(interaction.guild.id)
+        words = settings.get("words", [])
         if not words:
             await interaction.response.send_message("🚫 No bad words set yet.", ephemeral=True)
             return
@@ -100,30 +142,33 @@ class BadWordFilter(commands.Cog):
 
     @app_commands.command(name="ignorebadwordchannel", description="Ignore a channel from bad word filter")
     async def ignorebadwordchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        settings = self.guild_settings.get(interaction.guild.id)
         ch_id = str(channel.id)
-        if ch_id in self.settings["ignored_channels"]:
+        if ch_id in settings["ignored_channels"]:
             await interaction.response.send_message("⚠️ This channel is already ignored.", ephemeral=True)
             return
 
-        self.settings["ignored_channels"].append(ch_id)
-        save_settings(self.settings)
+        settings["ignored_channels"].append(ch_id)
+        self.save_guild(interaction.guild.id)
         await interaction.response.send_message(f"✅ Filter disabled in {channel.mention}", ephemeral=True)
 
     @app_commands.command(name="unignorebadwordchannel", description="Re-enable filter in an ignored channel")
     async def unignorebadwordchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        settings = self.guild_settings.get(interaction.guild.id)
         ch_id = str(channel.id)
-        if ch_id not in self.settings["ignored_channels"]:
+        if ch_id not in settings["ignored_channels"]:
             await interaction.response.send_message("⚠️ This channel is not ignored.", ephemeral=True)
             return
 
-        self.settings["ignored_channels"].remove(ch_id)
-        save_settings(self.settings)
+        settings["ignored_channels"].remove(ch_id)
+        self.save_guild(interaction.guild.id)
         await interaction.response.send_message(f"✅ Filter re-enabled in {channel.mention}", ephemeral=True)
 
     @app_commands.command(name="badwordstatus", description="Show current bad word filter settings")
     async def badwordstatus(self, interaction: discord.Interaction):
-        words = self.settings.get("words", [])
-        ignored_channels = self.settings.get("ignored_channels", [])
+        settings = self.guild_settings.get(interaction.guild.id)
+        words = settings.get("words", [])
+        ignored_channels = settings.get("ignored_channels", [])
 
         embed = discord.Embed(title="🛡️ Bad Word Filter Status", color=0x3498db)
         embed.add_field(name="Total Words", value=str(len(words)), inline=True)
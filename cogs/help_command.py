@@ -19,7 +19,8 @@ class HelpCommand(commands.Cog):
                 name="🛡️ Moderation",
                 value=(
                     "`/warn`, `/setwarnlog`, `/setspamfilter`, `/spamstatus`, `/ignorespamchannel`, `/unignorespamchannel`, `/setspamalertrole`\n"
-                    "`/addbadword`, `/removebadword`, `/badwordstatus`, `/setlinkfilter`, `/addlinkwhitelist`, `/removelinkwhitelist`, `/purge`"
+                    "`/addbadword`, `/removebadword`, `/badwordstatus`, `/setlinkfilter`, `/addlinkwhitelist`, `/removelinkwhitelist`, `/purge`\n"
+                    "`/setlinkblocklist`, `/reloadlinkblocklist`, `/setspamrate`, `/setchannelspamrate`, `/setspamraid`, `/setraidguard`, `/endlockdown`"
                 ),
                 inline=False
             )
@@ -50,7 +51,7 @@ class HelpCommand(commands.Cog):
 
             embed.add_field(
                 name="🔊 Private Voice Channels",
-                value="`/vcbutton`, `/setvcrole`",
+                value="`/vcbutton`, `/setvcrole`, `/setvcpool`",
                 inline=False
             )
 
@@ -1,86 +1,157 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import re
 import os
-import json
+import copy
+import asyncio
+from typing import NamedTuple
 
+from utils.domains import DomainSet, SortedDomainFile, build_sorted_domain_file, find_links, normalize_domain
+from utils.guild_config import IDLE_TTL, MAX_LOADED_GUILDS, GuildConfig
 from utils.logger import log_action  # ✅ Import logger
-
-LINK_REGEX = re.compile(r"https?://\S+")
+from utils.pipeline import get_pipeline
+from utils.policy import has_any_role, id_set
+from utils.settings_store import settings_store
+from utils.ttl_cache import TTLCache
 
 SETTINGS_PATH = "data/settings/linkfilter.json"
+BLOCKLIST_SETTINGS_PATH = "data/settings/link_blocklist.json"  # process-wide: the source file the index is built from
+BLOCKLIST_INDEX_PATH = "data/blocklists/domains.sorted"
+
+class ChannelLinkPolicy(NamedTuple):
+    """Compiled allow-list for one filtered channel."""
+    domains: DomainSet
+    bypass_roles: frozenset  # int role ids
 
 def load_settings():
-    if not os.path.exists(SETTINGS_PATH):
-        os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
-        with open(SETTINGS_PATH, "w") as f:
-            json.dump({}, f)
-    with open(SETTINGS_PATH, "r") as f:
-        return json.load(f)
+    return settings_store.load(SETTINGS_PATH, {})
 
 def save_settings(settings):
-    with open(SETTINGS_PATH, "w") as f:
-        json.dump(settings, f, indent=4)
+    settings_store.save(SETTINGS_PATH, settings)
 
-class LinkFilter(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-        self.settings = load_settings()
+def load_blocklist_settings():
+    return settings_store.load(BLOCKLIST_SETTINGS_PATH, {"enabled": False, "source": "data/blocklists/domains.txt"})
 
-    def reload_settings(self):
-        self.settings = load_settings()
+BLOCKLIST_GUILD_DEFAULTS = {"enabled": False}
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot or not message.guild:
-            return
+def legacy_blocklist_settings():
+    """Guilds seen for the first time inherit what used to be the global blocklist switch."""
+    data = copy.deepcopy(BLOCKLIST_GUILD_DEFAULTS)
+    data["enabled"] = bool(load_blocklist_settings().get("enabled", False))
+    return data
 
-        channel_id = str(message.channel.id)
-        if channel_id not in self.settings:
-            return
-
-        config = self.settings[channel_id]
-        if not config.get("enabled", False):
-            return
+# The index is shared by every guild; whether it is used is each guild's choice
+blocklist_guild_settings = GuildConfig("linkblocklist", BLOCKLIST_GUILD_DEFAULTS, seed=legacy_blocklist_settings)
 
-        whitelisted_roles = config.get("roles", [])
-        if any(str(role.id) in whitelisted_roles for role in message.author.roles):
+class LinkFilter(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.settings = load_settings()
+        self.compile_policy()
+        self.blocklist_settings = load_blocklist_settings()
+        self.blocklist_guild_settings = blocklist_guild_settings
+        self.blocklist_enabled = TTLCache(max_entries=MAX_LOADED_GUILDS, ttl=IDLE_TTL)  # guild_id: bool
+        self.blocklist = None  # SortedDomainFile, swapped whole on refresh
+        if os.path.exists(BLOCKLIST_INDEX_PATH):
+            self.blocklist = SortedDomainFile(BLOCKLIST_INDEX_PATH)
+
+    def compile_policy(self, settings=None):
+        """Snapshot the enabled channels keyed by int id, so per-message checks are set lookups."""
+        channels = {}
+        for channel_id, config in self.settings.items():
+            if config.get("enabled", False):
+                channels[int(channel_id)] = ChannelLinkPolicy(
+                    DomainSet(config.get("whitelist", [])),
+                    id_set(config.get("roles", []))
+                )
+        self.channels = channels
+
+    def is_blocklist_enabled(self, guild_id: int) -> bool:
+        enabled = self.blocklist_enabled.get(guild_id)
+        if enabled is None:
+            enabled = bool(self.blocklist_guild_settings.get(guild_id).get("enabled", False))
+            self.blocklist_enabled.set(guild_id, enabled)
+        return enabled
+
+    def blocklist_settings_changed(self, guild_id: int):
+        self.blocklist_enabled.pop(guild_id)
+
+    async def cog_load(self):
+        get_pipeline(self.bot).register("link_filter", self.moderate)
+        settings_store.subscribe(SETTINGS_PATH, self.compile_policy)
+        self.blocklist_guild_settings.subscribe(self.blocklist_settings_changed)
+
+    async def cog_unload(self):
+        get_pipeline(self.bot).unregister("link_filter")
+        settings_store.unsubscribe(SETTINGS_PATH, self.compile_policy)
+        self.blocklist_guild_settings.unsubscribe(self.blocklist_settings_changed)
+        if self.blocklist:
+            self.blocklist.close()
+
+    async def refresh_blocklist(self) -> int:
+        """Rebuild the sorted index from the local source file off the event loop, then swap it in."""
+        source = self.blocklist_settings.get("source", "data/blocklists/domains.txt")
+        os.makedirs(os.path.dirname(BLOCKLIST_INDEX_PATH), exist_ok=True)
+        count = await asyncio.to_thread(build_sorted_domain_file, source, BLOCKLIST_INDEX_PATH)
+
+        old = self.blocklist
+        self.blocklist = SortedDomainFile(BLOCKLIST_INDEX_PATH)
+        if old:
+            old.close()
+        return count
+
+    async def moderate(self, ctx):
+        message = ctx.message
+        blocklist = self.blocklist
+        if blocklist is not None and not self.is_blocklist_enabled(message.guild.id):
+            blocklist = None
+
+        # 🔒 Per-channel allow-list mode
+        policy = self.channels.get(message.channel.id)
+        if policy is not None and has_any_role(message.author, policy.bypass_roles):
+            policy = None
+
+        if policy is None and blocklist is None:
             return
 
-        whitelisted = config.get("whitelist", [])
-        found_links = LINK_REGEX.findall(message.content.lower())
-
-        for link in found_links:
-            if any(domain.lower() in link for domain in whitelisted):
+        for link, host in find_links(ctx.lowered):
+            # ⛔ Known scam/phishing domains are blocked everywhere, for everyone
+            if blocklist is not None and host in blocklist:
+                reason = "blocked"
+            elif policy is not None and host not in policy.domains:
+                reason = "not_allowed"
+            else:
                 continue
 
-            try:
-                await message.delete()
-                await message.channel.send(
-                    f"🚫 {message.author.mention}, links are not allowed in this channel.",
-                    delete_after=5
-                )
-
-                try:
-                    await log_action(
-                        self.bot,
-                        message.guild,
-                        title="🔗 Link Blocked",
-                        content=(
-                            f"**User:** {message.author.mention} (`{message.author.id}`)\n"
-                            f"**Channel:** {message.channel.mention}\n"
-                            f"**Message:** `{link}`"
-                        ),
-                        user=message.author
-                    )
-                except Exception as e:
-                    print(f"⚠️ Logging failed (link blocked): {e}")
+            if not await ctx.delete():
                 return
 
+            if reason == "blocked":
+                notice = f"⛔ {message.author.mention}, that link points to a blocked domain."
+            else:
+                notice = f"🚫 {message.author.mention}, links are not allowed in this channel."
+
+            try:
+                await message.channel.send(notice, delete_after=5)
             except discord.Forbidden:
                 pass
 
+            try:
+                await log_action(
+                    self.bot,
+                    message.guild,
+                    title="⛔ Blocked Domain Posted" if reason == "blocked" else "🔗 Link Blocked",
+                    content=(
+                        f"**User:** {message.author.mention} (`{message.author.id}`)\n"
+                        f"**Channel:** {message.channel.mention}\n"
+                        f"**Message:** `{link}`"
+                    ),
+                    user=message.author
+                )
+            except Exception as e:
+                print(f"⚠️ Logging failed (link blocked): {e}")
+            return
+
     @app_commands.command(name="setlinkfilter", description="Enable or disable link filtering in this channel")
     @app_commands.describe(enabled="Enable or disable link filtering in this channel")
     async def setlinkfilter(self, interaction: discord.Interaction, enabled: bool):
@@ -88,6 +159,7 @@ class LinkFilter(commands.Cog):
         self.settings.setdefault(channel_id, {"enabled": False, "whitelist": [], "roles": []})
         self.settings[channel_id]["enabled"] = enabled
         save_settings(self.settings)
+        self.compile_policy()
 
         status = "enabled ✅" if enabled else "disabled ❌"
         await interaction.response.send_message(
@@ -109,7 +181,11 @@ class LinkFilter(commands.Cog):
     async def addlinkwhitelist(self, interaction: discord.Interaction, domain: str):
         channel_id = str(interaction.channel_id)
         self.settings.setdefault(channel_id, {"enabled": False, "whitelist": [], "roles": []})
-        domain = domain.lower()
+        domain = normalize_domain(domain)
+
+        if not domain:
+            await interaction.response.send_message("⚠️ That doesn't look like a domain.", ephemeral=True)
+            return
 
         if domain in self.settings[channel_id]["whitelist"]:
             await interaction.response.send_message("⚠️ This domain is already allowed.", ephemeral=True)
@@ -117,6 +193,7 @@ class LinkFilter(commands.Cog):
 
         self.settings[channel_id]["whitelist"].append(domain)
         save_settings(self.settings)
+        self.compile_policy()
         await interaction.response.send_message(f"✅ `{domain}` has been whitelisted for this channel.", ephemeral=True)
 
         try:
@@ -133,7 +210,7 @@ class LinkFilter(commands.Cog):
     @app_commands.command(name="removelinkwhitelist", description="Remove a whitelisted domain from this channel")
     async def removelinkwhitelist(self, interaction: discord.Interaction, domain: str):
         channel_id = str(interaction.channel_id)
-        domain = domain.lower()
+        domain = normalize_domain(domain)
 
         if channel_id not in self.settings or domain not in self.settings[channel_id].get("whitelist", []):
             await interaction.response.send_message("⚠️ That domain is not whitelisted.", ephemeral=True)
@@ -141,6 +218,7 @@ class LinkFilter(commands.Cog):
 
         self.settings[channel_id]["whitelist"].remove(domain)
         save_settings(self.settings)
+        self.compile_policy()
         await interaction.response.send_message(f"✅ `{domain}` removed from whitelist.", ephemeral=True)
 
         try:
@@ -165,6 +243,7 @@ class LinkFilter(commands.Cog):
 
         self.settings[channel_id]["roles"].append(str(role.id))
         save_settings(self.settings)
+        self.compile_policy()
         await interaction.response.send_message(f"✅ Role {role.mention} is now allowed to post links.", ephemeral=True)
 
     @app_commands.command(name="removelinkwhitelistrole", description="Remove a role from link whitelist in this channel")
@@ -176,8 +255,46 @@ class LinkFilter(commands.Cog):
 
         self.settings[channel_id]["roles"].remove(str(role.id))
         save_settings(self.settings)
+        self.compile_policy()
         await interaction.response.send_message(f"✅ Role {role.mention} removed from whitelist.", ephemeral=True)
 
+    @app_commands.command(name="setlinkblocklist", description="Block known scam/phishing domains in every channel")
+    @app_commands.describe(enabled="Enable or disable the domain blocklist")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def setlinkblocklist(self, interaction: discord.Interaction, enabled: bool):
+        self.blocklist_guild_settings.get(interaction.guild.id)["enabled"] = enabled
+        self.blocklist_guild_settings.save(interaction.guild.id)
+        self.blocklist_settings_changed(interaction.guild.id)
+
+        if enabled and self.blocklist is None:
+            await interaction.response.send_message(
+                "⚠️ Blocklist enabled, but no list is loaded yet. The bot owner has to run `/reloadlinkblocklist`.", ephemeral=True
+            )
+            return
+
+        status = "enabled ✅" if enabled else "disabled ❌"
+        await interaction.response.send_message(f"⛔ Domain blocklist has been {status} in this server.", ephemeral=True)
+
+    @app_commands.command(name="reloadlinkblocklist", description="Rebuild the domain blocklist from its local source file (bot owner only)")
+    async def reloadlinkblocklist(self, interaction: discord.Interaction):
+        # The index is shared by every server, so only the bot owner may rebuild it
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("🚫 Only the bot owner can rebuild the blocklist.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            count = await self.refresh_blocklist()
+        except FileNotFoundError:
+            source = self.blocklist_settings.get("source")
+            await interaction.followup.send(f"❌ Blocklist source `{source}` not found.", ephemeral=True)
+            return
+        except Exception as e:
+            await interaction.followup.send(f"❌ Failed to rebuild blocklist: `{e}`", ephemeral=True)
+            return
+
+        await interaction.followup.send(f"🔁 Blocklist reloaded with **{count}** domains.", ephemeral=True)
+
     @app_commands.command(name="listlinkwhitelist", description="Show link filtering status and allowed domains for this channel")
     async def listlinkwhitelist(self, interaction: discord.Interaction):
         channel_id = str(interaction.channel_id)
@@ -196,6 +313,10 @@ class LinkFilter(commands.Cog):
             roles = [f"<@&{rid}>" for rid in role_ids]
             description += f"\n\n**Whitelisted Roles:**\n" + "\n".join(roles)
 
+        blocklist_on = self.is_blocklist_enabled(interaction.guild.id)
+        blocklist_size = len(self.blocklist) if self.blocklist else 0
+        description += f"\n\n⛔ **Domain Blocklist:** {'Enabled ✅' if blocklist_on else 'Disabled ❌'} ({blocklist_size} domains)"
+
         embed = discord.Embed(title="📁 Link Filter Settings", description=description, color=0x00b0f4)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
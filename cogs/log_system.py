@@ -2,23 +2,18 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
-import json
 import datetime
 
+from utils.settings_store import settings_store
+
 LOG_PATH = "data/settings/log_channel.json"
 VC_TRACKER = {}  # Stores join and stream times
 
 def load_log_config():
-    if os.path.exists(LOG_PATH):
-        with open(LOG_PATH, "r") as f:
-            return json.load(f)
-    return {}
+    return settings_store.load(LOG_PATH, {})
 
 def save_log_config(data):
-    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-    with open(LOG_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+    settings_store.save(LOG_PATH, data)
 
 def get_log_channel_id(guild_id: int):
     data = load_log_config()
@@ -0,0 +1,331 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import asyncio
+import datetime
+from collections import deque
+from typing import NamedTuple
+
+from cogs.auto_roles import PRIORITY_JOIN
+from utils.deadline_timer import DeadlineTimer
+from utils.guild_config import IDLE_TTL, MAX_LOADED_GUILDS, GuildConfig
+from utils.logger import log_action
+from utils.rate_window import RateWindow
+from utils.ttl_cache import TTLCache
+
+ACTION_INTERVAL = 1.0  # seconds between kicks/timeouts; keeps lockdown inside the member-moderation limits
+SCREENED_TTL = 600     # seconds a join's verdict is remembered (the join listener and auto-roles both ask)
+LOCKDOWN_LEVEL = discord.VerificationLevel.high
+
+GUILD_DEFAULTS = {
+    "enabled": False,
+    "joins": 10,               # joins within `seconds` that start a lockdown
+    "seconds": 10,
+    "min_account_age_days": 7,
+    "action": "timeout",       # what happens to flagged accounts during lockdown: kick, timeout or none
+    "timeout_minutes": 60,
+    "lockdown_minutes": 15     # lockdown ends this long after the last burst
+}
+
+class JoinPolicy(NamedTuple):
+    enabled: bool
+    joins: int
+    seconds: float
+    min_account_age: datetime.timedelta
+    action: str
+    timeout: datetime.timedelta
+    lockdown_seconds: float
+
+guild_settings = GuildConfig("raidguard", GUILD_DEFAULTS)
+
+def compile_policy(settings: dict) -> JoinPolicy:
+    return JoinPolicy(
+        bool(settings.get("enabled", False)),
+        max(int(settings.get("joins", GUILD_DEFAULTS["joins"])), 2),
+        float(settings.get("seconds", GUILD_DEFAULTS["seconds"])),
+        datetime.timedelta(days=float(settings.get("min_account_age_days", GUILD_DEFAULTS["min_account_age_days"]))),
+        settings.get("action", GUILD_DEFAULTS["action"]),
+        datetime.timedelta(minutes=float(settings.get("timeout_minutes", GUILD_DEFAULTS["timeout_minutes"]))),
+        float(settings.get("lockdown_minutes", GUILD_DEFAULTS["lockdown_minutes"])) * 60
+    )
+
+def is_suspicious(member: discord.Member, policy: JoinPolicy, now: datetime.datetime) -> bool:
+    """New account that never set an avatar: the usual shape of a bought or scripted raid account."""
+    return member.avatar is None and now - member.created_at < policy.min_account_age
+
+class RaidGuard(commands.Cog):
+    """Watches the join rate per guild and locks the guild down during a join raid.
+
+    Each join is one ring-buffer write (RateWindow) plus two attribute checks.
+    While locked down, auto-roles are held (and taken back from the joins that
+    tripped the detector), the verification level is raised, and flagged
+    accounts are kicked or timed out one at a time by a worker. The log channel
+    gets an alert when a lockdown starts and a summary when it ends.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.guild_settings = guild_settings
+        self.policies = TTLCache(max_entries=MAX_LOADED_GUILDS, ttl=IDLE_TTL)  # guild_id: JoinPolicy
+        self.windows = TTLCache(max_entries=MAX_LOADED_GUILDS, ttl=IDLE_TTL)   # guild_id: (RateWindow, recent joins)
+        self.screened = TTLCache(max_entries=10000, ttl=SCREENED_TTL)          # (guild_id, member_id): held?
+        self.lockdowns = {}  # guild_id: lockdown state
+        self.lockdown_timer = DeadlineTimer(self.end_lockdown)
+        self.actions = asyncio.Queue()
+        self.worker = None
+        self.tasks = set()  # lockdown alerts being sent
+
+    def get_policy(self, guild_id: int) -> JoinPolicy:
+        policy = self.policies.get(guild_id)
+        if policy is None:
+            policy = compile_policy(self.guild_settings.get(guild_id))
+            self.policies.set(guild_id, policy)
+        return policy
+
+    def settings_changed(self, guild_id: int):
+        self.policies.pop(guild_id)
+
+    def update_guild(self, guild_id: int, **changes):
+        self.guild_settings.get(guild_id).update(changes)
+        self.guild_settings.save(guild_id)
+        self.settings_changed(guild_id)
+
+    async def cog_load(self):
+        self.guild_settings.subscribe(self.settings_changed)
+        self.worker = asyncio.create_task(self.action_worker())
+
+    async def cog_unload(self):
+        self.guild_settings.unsubscribe(self.settings_changed)
+        self.lockdown_timer.stop()
+        if self.worker:
+            self.worker.cancel()
+
+    def is_locked_down(self, guild_id: int) -> bool:
+        return guild_id in self.lockdowns
+
+    def is_held(self, member: discord.Member) -> bool:
+        """True if the member's auto-roles are held by a lockdown."""
+        return self.screened.get((member.guild.id, member.id), False)
+
+    # ==== Per-join check ====
+
+    def screen(self, member: discord.Member) -> bool:
+        """Record a join once and return True if its auto-roles must be held.
+
+        Safe to call from several listeners for the same join; only the first
+        call counts towards the join rate.
+        """
+        key = (member.guild.id, member.id)
+        verdict = self.screened.get(key)
+        if verdict is not None:
+            return verdict
+
+        policy = self.get_policy(member.guild.id)
+        if not policy.enabled:
+            self.screened.set(key, False)
+            return False
+
+        now = discord.utils.utcnow()
+        entry = self.windows.get(member.guild.id)
+        if entry is None or len(entry[0]) != policy.joins:
+            entry = (RateWindow(policy.joins), deque(maxlen=policy.joins))
+            self.windows.set(member.guild.id, entry)
+        window, recent = entry
+        recent.append(member)
+
+        if window.hit(now.timestamp(), policy.seconds):
+            self.start_lockdown(member.guild, policy, recent)
+
+        held = member.guild.id in self.lockdowns
+        if held:
+            self.hold(member, policy, now)
+        self.screened.set(key, held)
+        return held
+
+    def hold(self, member: discord.Member, policy: JoinPolicy, now: datetime.datetime):
+        state = self.lockdowns[member.guild.id]
+        if member.id in state["seen"]:
+            return
+        state["seen"].add(member.id)
+        state["joins"] += 1
+
+        # Joins that tripped the detector may already be waiting for or holding auto-roles
+        auto_roles = self.bot.get_cog("AutoRoles")
+        if auto_roles:
+            auto_roles.withdraw(member)
+        if is_suspicious(member, policy, now):
+            state["flagged"] += 1
+            if policy.action in ("kick", "timeout"):
+                self.actions.put_nowait((member, policy))
+        else:
+            state["held"][member.id] = member
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.screen(member)
+
+    # ==== Lockdown ====
+
+    def start_lockdown(self, guild: discord.Guild, policy: JoinPolicy, recent):
+        # Every burst pushes the end back
+        self.lockdown_timer.schedule(guild, policy.lockdown_seconds)
+        if guild.id in self.lockdowns:
+            return
+
+        self.lockdowns[guild.id] = {
+            "started": discord.utils.utcnow(),
+            "previous_level": guild.verification_level,
+            "seen": set(),
+            "held": {},  # member_id: member, released to auto-roles when the lockdown ends
+            "raise_level": None,  # task raising the verification level
+            "joins": 0,
+            "flagged": 0,
+            "actioned": 0,
+            "failed": 0,
+        }
+        print(f"🚨 Join raid detected in {guild.name}: lockdown started")
+
+        # The joins that tripped the detector are judged too
+        now = discord.utils.utcnow()
+        for member in list(recent):
+            self.screened.set((guild.id, member.id), True)
+            self.hold(member, policy, now)
+
+        if guild.verification_level < LOCKDOWN_LEVEL:
+            self.lockdowns[guild.id]["raise_level"] = asyncio.create_task(self.set_verification_level(guild, LOCKDOWN_LEVEL))
+
+        task = asyncio.create_task(self.log_lockdown_start(guild, policy))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def log_lockdown_start(self, guild: discord.Guild, policy: JoinPolicy):
+        try:
+            await log_action(
+                self.bot,
+                guild,
+                title="🚨 Join Raid Detected",
+                content=(
+                    f"**Trigger:** {policy.joins} joins within {policy.seconds:g}s\n"
+                    f"**Lockdown:** auto-roles held, verification level raised to {LOCKDOWN_LEVEL.name}\n"
+                    f"**New accounts without avatar:** `{policy.action}`\n"
+                    f"Ends {policy.lockdown_seconds / 60:g} min after the last burst, or with `/endlockdown`."
+                )
+            )
+        except Exception as e:
+            print(f"⚠️ Logging failed (raid lockdown): {e}")
+
+    async def end_lockdown(self, guild: discord.Guild):
+        self.lockdown_timer.cancel(guild)
+        state = self.lockdowns.pop(guild.id, None)
+        if state is None:
+            return
+
+        # Let the raise land first, or restoring could be overtaken by it and leave the guild on high
+        if state["raise_level"] is not None:
+            await state["raise_level"]
+        if state["previous_level"] < LOCKDOWN_LEVEL:
+            await self.set_verification_level(guild, state["previous_level"])
+
+        # Held members that are still here get their auto-roles now
+        released = 0
+        auto_roles = self.bot.get_cog("AutoRoles")
+        for member in state["held"].values():
+            if guild.get_member(member.id) is None:
+                continue
+            released += 1
+            self.screened.set((guild.id, member.id), False)
+            if auto_roles:
+                await auto_roles.enqueue(member, PRIORITY_JOIN)
+
+        minutes = (discord.utils.utcnow() - state["started"]).total_seconds() / 60
+        print(f"✅ Lockdown ended in {guild.name}")
+        await log_action(
+            self.bot,
+            guild,
+            title="🚨 Join Raid Lockdown Summary",
+            content=(
+                f"**Duration:** {minutes:.0f} min\n"
+                f"**Joins during lockdown:** {state['joins']}\n"
+                f"**Flagged (new account, no avatar):** {state['flagged']}\n"
+                f"**Actioned:** {state['actioned']} ({state['failed']} failed)\n"
+                f"**Held then released to auto-roles:** {released}\n"
+                f"**Verification level:** restored to {state['previous_level'].name}"
+            )
+        )
+
+    async def set_verification_level(self, guild: discord.Guild, level: discord.VerificationLevel):
+        try:
+            await guild.edit(verification_level=level, reason="Join raid lockdown")
+        except discord.HTTPException as e:
+            print(f"⚠️ Failed to change verification level in {guild.name}: {e}")
+
+    async def action_worker(self):
+        """Kicks or times out flagged accounts one at a time, ACTION_INTERVAL apart."""
+        while True:
+            member, policy = await self.actions.get()
+            state = self.lockdowns.get(member.guild.id)
+            try:
+                if policy.action == "kick":
+                    await member.kick(reason="Join raid: new account without avatar")
+                else:
+                    await member.timeout(policy.timeout, reason="Join raid: new account without avatar")
+                if state:
+                    state["actioned"] += 1
+            except discord.NotFound:
+                pass  # already left
+            except discord.HTTPException as e:
+                if state:
+                    state["failed"] += 1
+                print(f"⚠️ Failed to {policy.action} {member}: {e}")
+            await asyncio.sleep(ACTION_INTERVAL)
+
+    # ==== Commands ====
+
+    @app_commands.command(name="setraidguard", description="Configure join raid detection and lockdown")
+    @app_commands.describe(
+        enabled="Turn raid detection on or off",
+        joins="Joins that start a lockdown",
+        seconds="Time window for those joins",
+        action="What to do with new accounts without an avatar during lockdown"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Timeout", value="timeout"),
+        app_commands.Choice(name="Kick", value="kick"),
+        app_commands.Choice(name="Nothing (just hold their roles)", value="none")
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def setraidguard(self, interaction: discord.Interaction, enabled: bool,
+                           joins: app_commands.Range[int, 2, 100] = None,
+                           seconds: app_commands.Range[float, 1, 300] = None,
+                           action: app_commands.Choice[str] = None):
+        changes = {"enabled": enabled}
+        if joins is not None:
+            changes["joins"] = joins
+        if seconds is not None:
+            changes["seconds"] = seconds
+        if action is not None:
+            changes["action"] = action.value
+        self.update_guild(interaction.guild.id, **changes)
+
+        policy = self.get_policy(interaction.guild.id)
+        if not enabled:
+            await interaction.response.send_message("✅ Raid guard disabled.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"✅ Raid guard enabled: lockdown after {policy.joins} joins in {policy.seconds:g}s, "
+            f"flagged accounts: `{policy.action}`.",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="endlockdown", description="End a join raid lockdown now")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def endlockdown(self, interaction: discord.Interaction):
+        if not self.is_locked_down(interaction.guild.id):
+            await interaction.response.send_message("ℹ️ This server is not in lockdown.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        await self.end_lockdown(interaction.guild)
+        await interaction.followup.send("✅ Lockdown ended; held members are getting their auto-roles.", ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(RaidGuard(bot))
@@ -2,53 +2,165 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import re
-import os
-import json
+import sys
+import copy
 import time
 from collections import deque
+from typing import NamedTuple
 
+from utils.deletion_queue import get_deletion_queue
+from utils.guild_config import IDLE_TTL, MAX_LOADED_GUILDS, GuildConfig
 from utils.logger import log_action
-
-SETTINGS_PATH = "data/settings/spamfilter.json"
+from utils.near_duplicate import NearDuplicateIndex, signature
+from utils.pipeline import get_pipeline
+from utils.policy import id_set
+from utils.rate_window import RateWindow
+from utils.settings_store import settings_store
+from utils.ttl_cache import TTLCache
+
+SETTINGS_PATH = "data/settings/spamfilter.json"  # process-wide limits; template for new guilds
 USER_COOLDOWN = 10  # seconds
 USER_HISTORY_LIMIT = 5  # check last 5 messages
 
-def load_settings():
-    if not os.path.exists(SETTINGS_PATH):
-        os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
-        with open(SETTINGS_PATH, "w") as f:
-            json.dump({"enabled": False, "ignored_channels": [], "spam_alert_role_id": None}, f)
-    with open(SETTINGS_PATH, "r") as f:
-        return json.load(f)
+# Defaults for the per-user state limits (process-wide, overridable in spamfilter.json)
+HISTORY_TTL = 300  # forget users idle for 5 minutes
+MAX_TRACKED_USERS = 5000
+HISTORY_MEMORY_KB = 2048
+
+# Default flood thresholds: N messages within T seconds (0 messages disables a check)
+USER_RATE = (6, 5)
+CHANNEL_RATE = (25, 5)
+CHANNEL_ALERT_COOLDOWN = 60  # seconds between flood alerts for the same channel
+
+# Cross-user near-duplicate (raid) detection defaults
+RAID_WINDOW = 60         # seconds a fingerprint stays in the index
+RAID_SIMILARITY = 0.7    # estimated Jaccard similarity to count as the same text
+RAID_MIN_USERS = 0       # distinct authors posting it before the cluster is removed; off until a guild opts in
+RAID_MIN_LENGTH = 16     # shorter messages ("lol", "gg") are never fingerprinted
+RAID_MAX_ENTRIES = 2000  # per guild
+
+GUILD_DEFAULTS = {"enabled": False, "ignored_channels": [], "spam_alert_role_id": None}
+GUILD_KEYS = (
+    "enabled", "ignored_channels", "spam_alert_role_id",
+    "user_rate_messages", "user_rate_seconds", "channel_rate_messages", "channel_rate_seconds",
+    "raid_window", "raid_similarity", "raid_min_users"
+)
+
+class SpamPolicy(NamedTuple):
+    """One guild's settings as the per-message path reads them, compiled once per change."""
+    enabled: bool
+    ignored_channels: frozenset  # int channel ids
+    alert_ping: str              # role mention for reports, or None
+    user_rate: tuple             # (messages, seconds)
+    channel_rate: tuple
+    raid_window: float
+    raid_similarity: float
+    raid_min_users: int
 
-def save_settings(data):
-    with open(SETTINGS_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+def load_settings():
+    return settings_store.load(SETTINGS_PATH, {})
+
+def legacy_guild_settings():
+    """Guilds seen for the first time inherit what used to be the global spam settings."""
+    data = copy.deepcopy(GUILD_DEFAULTS)
+    legacy = load_settings()
+    data.update({key: copy.deepcopy(legacy[key]) for key in GUILD_KEYS if key in legacy})
+    return data
+
+guild_settings = GuildConfig("spamfilter", GUILD_DEFAULTS, seed=legacy_guild_settings)
+
+def get_rate(settings: dict, messages_key: str, seconds_key: str, default):
+    return (
+        int(settings.get(messages_key, default[0])),
+        float(settings.get(seconds_key, default[1]))
+    )
+
+def compile_policy(settings: dict) -> SpamPolicy:
+    role_id = settings.get("spam_alert_role_id")
+    return SpamPolicy(
+        bool(settings.get("enabled", False)),
+        id_set(settings.get("ignored_channels", [])),
+        f"<@&{role_id}>" if role_id else None,
+        get_rate(settings, "user_rate_messages", "user_rate_seconds", USER_RATE),
+        get_rate(settings, "channel_rate_messages", "channel_rate_seconds", CHANNEL_RATE),
+        settings.get("raid_window", RAID_WINDOW),
+        settings.get("raid_similarity", RAID_SIMILARITY),
+        settings.get("raid_min_users", RAID_MIN_USERS)
+    )
+
+def history_size(history):
+    return sys.getsizeof(history) + sum(sys.getsizeof(msg) for msg in history)
 
 class SpamFilter(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.settings = load_settings()
-        self.user_timestamps = {}  # cooldown tracker
-        self.user_history = {}     # user_id: deque of last messages
-
-    def reload_settings(self):
-        self.settings = load_settings()
+        self.guild_settings = guild_settings
+        self.policies = TTLCache(max_entries=MAX_LOADED_GUILDS, ttl=IDLE_TTL)  # guild_id: SpamPolicy
+        self.user_timestamps = TTLCache(ttl=USER_COOLDOWN)  # cooldown tracker, entries expire with the cooldown
+        self.user_history = TTLCache(sizeof=history_size)  # user_id: deque of last messages
+        # Windows only need to outlive their own time span (at most 60s, see the rate commands)
+        self.user_rates = TTLCache(ttl=60)     # (guild_id, user_id): RateWindow, thresholds differ per guild
+        self.channel_rates = TTLCache(ttl=60)  # channel_id: RateWindow
+        self.channel_alerts = TTLCache(ttl=CHANNEL_ALERT_COOLDOWN)  # channel_id: last alert time
+        self.raid_indexes = TTLCache(max_entries=1000, ttl=RAID_WINDOW * 10)  # guild_id: NearDuplicateIndex
+        self.apply_limits()
+
+    def apply_limits(self, settings=None):
+        """Bound per-user state so memory follows active users, not everyone seen since boot."""
+        max_users = self.settings.get("max_tracked_users", MAX_TRACKED_USERS)
+        self.user_history.configure(
+            max_entries=max_users,
+            ttl=self.settings.get("history_ttl", HISTORY_TTL),
+            max_bytes=self.settings.get("history_memory_kb", HISTORY_MEMORY_KB) * 1024
+        )
+        self.user_timestamps.configure(max_entries=max_users)
+        self.user_rates.configure(max_entries=max_users)
+
+    def get_policy(self, guild_id: int) -> SpamPolicy:
+        policy = self.policies.get(guild_id)
+        if policy is None:
+            policy = compile_policy(self.guild_settings.get(guild_id))
+            self.policies.set(guild_id, policy)
+        return policy
+
+    def settings_changed(self, guild_id: int):
+        """Drop a guild's compiled policy; the next message recompiles it."""
+        self.policies.pop(guild_id)
+
+    def update_guild(self, guild_id: int, **changes):
+        settings = self.guild_settings.get(guild_id)
+        settings.update(changes)
+        self.guild_settings.save(guild_id)
+        self.settings_changed(guild_id)
+
+    def hit_rate(self, windows: TTLCache, key, rate, now: float) -> bool:
+        """O(1) sliding-window check: True once `rate` messages land inside its time span."""
+        limit, per = rate
+        if limit <= 0:
+            return False
+        window = windows.get(key)
+        if window is None or len(window) != limit:
+            window = RateWindow(limit)
+            windows.set(key, window)
+        return window.hit(now, per)
 
     def is_on_cooldown(self, user_id: int) -> bool:
         now = time.time()
         return now - self.user_timestamps.get(user_id, 0) < USER_COOLDOWN
 
     def update_cooldown(self, user_id: int):
-        self.user_timestamps[user_id] = time.time()
+        self.user_timestamps.set(user_id, time.time())
 
-    def update_history(self, user_id: int, content: str):
-        if user_id not in self.user_history:
-            self.user_history[user_id] = deque(maxlen=USER_HISTORY_LIMIT)
-        self.user_history[user_id].append(content.strip().lower())
+    def update_history(self, user_id: int, lowered: str):
+        history = self.user_history.get(user_id)
+        if history is None:
+            history = deque(maxlen=USER_HISTORY_LIMIT)
+        history.append(lowered.strip())
+        self.user_history.set(user_id, history)
 
     def is_repeating_history(self, user_id: int) -> bool:
-        history = self.user_history.get(user_id, [])
+        history = self.user_history.get(user_id) or []
         if len(history) < USER_HISTORY_LIMIT:
             return False
         return all(msg == history[0] for msg in history)
@@ -69,57 +181,143 @@ class SpamFilter(commands.Cog):
 
         return False
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot or not message.guild:
-            return
+    async def cog_load(self):
+        get_pipeline(self.bot).register("spam_filter", self.moderate)
+        settings_store.subscribe(SETTINGS_PATH, self.apply_limits)
+        self.guild_settings.subscribe(self.settings_changed)
+
+    async def cog_unload(self):
+        get_pipeline(self.bot).unregister("spam_filter")
+        settings_store.unsubscribe(SETTINGS_PATH, self.apply_limits)
+        self.guild_settings.unsubscribe(self.settings_changed)
 
+    async def moderate(self, ctx):
+        message = ctx.message
         user_id = message.author.id
+        policy = self.get_policy(message.guild.id)
+
+        if not policy.enabled or message.channel.id in policy.ignored_channels:
+            return
+
+        self.update_history(user_id, ctx.lowered)
 
-        if not self.settings.get("enabled", False):
+        now = time.monotonic()
+        if self.hit_rate(self.channel_rates, message.channel.id, policy.channel_rate, now):
+            await self.report_channel_flood(message, policy, now)
+
+        if await self.check_raid_cluster(ctx, policy, now):
             return
 
-        if str(message.channel.id) in self.settings.get("ignored_channels", []):
+        if self.hit_rate(self.user_rates, (message.guild.id, user_id), policy.user_rate, now):
+            reason = f"Flooding ({policy.user_rate[0]} messages in {policy.user_rate[1]:g}s)"
+        elif self.is_spam(ctx.content, user_id) and not self.is_on_cooldown(user_id):
+            reason = "Repeated content"
+        else:
             return
 
-        self.update_history(user_id, message.content)
+        if not await ctx.delete():
+            return
 
-        if self.is_spam(message.content, user_id) and not self.is_on_cooldown(user_id):
-            try:
-                await message.delete()
-            except discord.Forbidden:
-                return
-            except Exception as e:
-                print(f"⚠️ Failed to delete spam message: {e}")
-                return
+        # Floods delete every message but only report once per cooldown
+        if self.is_on_cooldown(user_id):
+            return
 
-            role_id = self.settings.get("spam_alert_role_id")
-            role_mention = f"<@&{role_id}>" if role_id else None
+        try:
+            await log_action(
+                self.bot,
+                message.guild,
+                title="🚨 Spam Message Deleted",
+                content=(
+                    f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
+                    f"**Channel:** {message.channel.mention}\n"
+                    f"**Reason:** {reason}\n"
+                    f"**Content:**\n```{message.content[:300]}```"
+                ),
+                user=message.author,
+                ping=policy.alert_ping  # ✅ Pings role outside embed
+            )
+        except Exception as e:
+            print(f"⚠️ log_action failed in spam filter: {e}")
+
+        self.update_cooldown(user_id)
+
+    def get_raid_index(self, guild_id: int, policy: SpamPolicy) -> NearDuplicateIndex:
+        index = self.raid_indexes.get(guild_id)
+        # Fingerprints are short-lived, so new thresholds simply start from a fresh index
+        if index is None or (index.window, index.threshold) != (policy.raid_window, policy.raid_similarity):
+            index = NearDuplicateIndex(policy.raid_window, policy.raid_similarity, RAID_MAX_ENTRIES)
+            self.raid_indexes.set(guild_id, index)
+        return index
+
+    async def check_raid_cluster(self, ctx, policy: SpamPolicy, now: float) -> bool:
+        """Catch many accounts posting variations of the same text. True if the message was removed."""
+        if policy.raid_min_users <= 0 or len(ctx.normalized) < RAID_MIN_LENGTH:
+            return False
+        sig = signature(ctx.normalized)
+        if sig is None:
+            return False
+
+        message = ctx.message
+        entry, cluster = self.get_raid_index(message.guild.id, policy).add(now, sig, message.author.id, message)
 
+        already_flagged = any(other.flagged for other in cluster)
+        authors = {other.author_id for other in cluster}
+        authors.add(entry.author_id)
+        if not already_flagged and len(authors) < policy.raid_min_users:
+            return False
+
+        # 🧬 Act on the whole cluster, not just the message that tipped it over
+        entry.flagged = True
+        leftovers = [other for other in cluster if not other.flagged]
+        for other in leftovers:
+            other.flagged = True
+        queue = get_deletion_queue(self.bot)
+        for other in leftovers:
+            queue.delete(other.payload)
+        await ctx.delete()
+
+        if not already_flagged:
             try:
                 await log_action(
                     self.bot,
                     message.guild,
-                    title="🚨 Spam Message Deleted",
+                    title="🧬 Coordinated Spam Detected",
                     content=(
-                        f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
-                        f"**Channel:** {message.channel.mention}\n"
-                        f"**Content:**\n```{message.content[:300]}```"
+                        f"**{len(cluster) + 1}** near-identical messages from **{len(authors)}** users "
+                        f"in the last {policy.raid_window}s were removed.\n"
+                        f"**Sample:**\n```{message.content[:300]}```"
                     ),
-                    user=message.author,
-                    ping=role_mention  # ✅ Pings role outside embed
+                    ping=policy.alert_ping
                 )
             except Exception as e:
                 print(f"⚠️ log_action failed in spam filter: {e}")
+        return True
 
-            self.update_cooldown(user_id)
+    async def report_channel_flood(self, message: discord.Message, policy: SpamPolicy, now: float):
+        if self.channel_alerts.get(message.channel.id) is not None:
+            return
+        self.channel_alerts.set(message.channel.id, now)
+
+        messages, seconds = policy.channel_rate
+        try:
+            await log_action(
+                self.bot,
+                message.guild,
+                title="🌊 Channel Flood Detected",
+                content=(
+                    f"**Channel:** {message.channel.mention}\n"
+                    f"At least {messages} messages in {seconds:g}s. Consider slowmode or a lockdown."
+                ),
+                ping=policy.alert_ping
+            )
+        except Exception as e:
+            print(f"⚠️ log_action failed in spam filter: {e}")
 
     # ==== Slash Commands ====
 
     @app_commands.command(name="setspamfilter", description="Enable or disable spam filter globally")
     async def setspamfilter(self, interaction: discord.Interaction, enabled: bool):
-        self.settings["enabled"] = enabled
-        save_settings(self.settings)
+        self.update_guild(interaction.guild.id, enabled=enabled)
         await interaction.response.send_message(
             f"✅ Spam filter is now {'enabled' if enabled else 'disabled'} across the server.",
             ephemeral=True
@@ -128,37 +326,82 @@ class SpamFilter(commands.Cog):
     @app_commands.command(name="ignorespamchannel", description="Disable spam filter in a specific channel")
     async def ignorespamchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
         ch_id = str(channel.id)
-        if ch_id in self.settings["ignored_channels"]:
+        ignored = self.guild_settings.get(interaction.guild.id).setdefault("ignored_channels", [])
+        if ch_id in ignored:
             await interaction.response.send_message("⚠️ This channel is already ignored.", ephemeral=True)
             return
 
-        self.settings["ignored_channels"].append(ch_id)
-        save_settings(self.settings)
+        ignored.append(ch_id)
+        self.update_guild(interaction.guild.id)
         await interaction.response.send_message(f"✅ Spam filter disabled in {channel.mention}.", ephemeral=True)
 
     @app_commands.command(name="unignorespamchannel", description="Re-enable spam filter in an ignored channel")
     async def unignorespamchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
         ch_id = str(channel.id)
-        if ch_id not in self.settings["ignored_channels"]:
+        ignored = self.guild_settings.get(interaction.guild.id).setdefault("ignored_channels", [])
+        if ch_id not in ignored:
             await interaction.response.send_message("⚠️ This channel is not ignored.", ephemeral=True)
             return
 
-        self.settings["ignored_channels"].remove(ch_id)
-        save_settings(self.settings)
+        ignored.remove(ch_id)
+        self.update_guild(interaction.guild.id)
         await interaction.response.send_message(f"✅ Spam filter re-enabled in {channel.mention}.", ephemeral=True)
 
     @app_commands.command(name="setspamalertrole", description="Set a role to tag in spam log reports")
     @app_commands.checks.has_permissions(administrator=True)
     async def setspamalertrole(self, interaction: discord.Interaction, role: discord.Role):
-        self.settings["spam_alert_role_id"] = role.id
-        save_settings(self.settings)
+        self.update_guild(interaction.guild.id, spam_alert_role_id=role.id)
         await interaction.response.send_message(f"✅ Spam alert role set to: {role.mention}", ephemeral=True)
 
+    @app_commands.command(name="setspamrate", description="Flag users who send too many messages too fast")
+    @app_commands.describe(messages="Messages allowed (0 disables)", seconds="Time window in seconds")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def setspamrate(self, interaction: discord.Interaction, messages: app_commands.Range[int, 0, 50], seconds: app_commands.Range[float, 1, 60]):
+        self.update_guild(interaction.guild.id, user_rate_messages=messages, user_rate_seconds=seconds)
+        if messages == 0:
+            await interaction.response.send_message("✅ Per-user flood detection disabled.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"✅ Users sending {messages} messages within {seconds:g}s will be treated as flooding.", ephemeral=True
+        )
+
+    @app_commands.command(name="setchannelspamrate", description="Alert when a channel gets too many messages too fast")
+    @app_commands.describe(messages="Messages allowed (0 disables)", seconds="Time window in seconds")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def setchannelspamrate(self, interaction: discord.Interaction, messages: app_commands.Range[int, 0, 500], seconds: app_commands.Range[float, 1, 60]):
+        self.update_guild(interaction.guild.id, channel_rate_messages=messages, channel_rate_seconds=seconds)
+        if messages == 0:
+            await interaction.response.send_message("✅ Channel flood alerts disabled.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"✅ Channels receiving {messages} messages within {seconds:g}s will raise a flood alert.", ephemeral=True
+        )
+
+    @app_commands.command(name="setspamraid", description="Remove near-identical messages posted by many users at once")
+    @app_commands.describe(users="Distinct users posting the same text before it is removed (0 disables)")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def setspamraid(self, interaction: discord.Interaction, users: app_commands.Range[int, 0, 50]):
+        if users == 1:
+            await interaction.response.send_message("⚠️ Use at least 2 users, or 0 to disable.", ephemeral=True)
+            return
+        self.update_guild(interaction.guild.id, raid_min_users=users)
+        if users == 0:
+            await interaction.response.send_message("✅ Coordinated spam detection disabled.", ephemeral=True)
+            return
+        policy = self.get_policy(interaction.guild.id)
+        await interaction.response.send_message(
+            f"✅ Text posted by {users}+ users within {policy.raid_window}s "
+            f"(~{int(policy.raid_similarity * 100)}% similar) will be removed.",
+            ephemeral=True
+        )
+
     @app_commands.command(name="spamstatus", description="Show current spam filter settings")
     async def spamstatus(self, interaction: discord.Interaction):
-        enabled = self.settings.get("enabled", False)
-        ignored = self.settings.get("ignored_channels", [])
-        alert_role = self.settings.get("spam_alert_role_id")
+        settings = self.guild_settings.get(interaction.guild.id)
+        policy = self.get_policy(interaction.guild.id)
+        enabled = policy.enabled
+        ignored = settings.get("ignored_channels", [])
+        alert_role = settings.get("spam_alert_role_id")
 
         embed = discord.Embed(title="🛡️ Spam Filter Status", color=0xf1c40f)
         embed.add_field(name="Status", value="✅ Enabled" if enabled else "❌ Disabled", inline=False)
@@ -174,6 +417,31 @@ class SpamFilter(commands.Cog):
         else:
             embed.add_field(name="Alert Role", value="Not set", inline=False)
 
+        def describe_rate(rate):
+            return "Disabled" if rate[0] <= 0 else f"{rate[0]} messages / {rate[1]:g}s"
+
+        embed.add_field(name="User Flood Limit", value=describe_rate(policy.user_rate), inline=True)
+        embed.add_field(name="Channel Flood Limit", value=describe_rate(policy.channel_rate), inline=True)
+
+        embed.add_field(
+            name="Raid Detection",
+            value=(
+                "Disabled" if policy.raid_min_users <= 0 else
+                f"{policy.raid_min_users}+ users posting ~{int(policy.raid_similarity * 100)}% similar text within {policy.raid_window}s"
+            ),
+            inline=False
+        )
+
+        stats = self.user_history.stats()
+        embed.add_field(
+            name="Tracked Users",
+            value=(
+                f"{stats['entries']} active (~{stats['bytes'] // 1024} KB)\n"
+                f"{stats['evictions']} evicted, {stats['expirations']} expired"
+            ),
+            inline=False
+        )
+
         embed.set_footer(text=f"Cooldown: {USER_COOLDOWN}s per user")
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1,32 +1,28 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
 import os
 
-BADWORD_PATH = "data/settings/badwords.json"
+from cogs.vc_logic import active_vcs, vc_pool, vc_role_stats
+from utils.deletion_queue import get_deletion_queue
+from utils.role_queue import role_queue
+from utils.settings_store import settings_store
+from utils.settings_watcher import settings_watcher
+
 STICKY_PATH = "data/settings/sticky_channels.json"
-LOG_PATH = "data/settings/log.json"
+LOG_PATH = "data/settings/log_channel.json"
 
 class StatusReload(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    def load_json(self, path):
-        if not os.path.exists(path):
-            return {}
-        with open(path, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-
     @app_commands.command(name="botstatus", description="Show current bot feature status")
     @app_commands.checks.has_permissions(administrator=True)
     async def botstatus(self, interaction: discord.Interaction):
-        badword_data = self.load_json(BADWORD_PATH)
-        sticky_data = self.load_json(STICKY_PATH)
-        log_data = self.load_json(LOG_PATH)
+        bad_cog = self.bot.get_cog("BadWordFilter")
+        badword_data = bad_cog.guild_settings.get(interaction.guild.id) if bad_cog else {}
+        sticky_data = settings_store.load(STICKY_PATH, [])
+        log_data = settings_store.load(LOG_PATH, {})
 
         embed = discord.Embed(title="📊 Bot Feature Status", color=0x3498db)
 
@@ -53,21 +49,71 @@ class StatusReload(commands.Cog):
             inline=False
         )
 
+        deletions = get_deletion_queue(self.bot).stats()
+        embed.add_field(
+            name="🗑️ Moderation Deletes",
+            value=(
+                f"{deletions['requested']} messages in {deletions['rest_calls']} REST calls "
+                f"({deletions['saved']} saved, {deletions['failed']} failed)"
+            ),
+            inline=False
+        )
+
+        pool = vc_pool.stats()
+        embed.add_field(
+            name="🎧 Temporary VCs",
+            value=(
+                f"{len(active_vcs)} active, {pool['idle']} ready in pools "
+                f"({pool['hits']} handed out, {pool['misses']} created on demand)\n"
+                f"VC role: {vc_role_stats['events']} voice events, {vc_role_stats['edits']} role edits"
+            ),
+            inline=False
+        )
+
+        auto_roles = self.bot.get_cog("AutoRoles")
+        if auto_roles:
+            joins = auto_roles.stats()
+            embed.add_field(
+                name="👥 Join Queue",
+                value=(
+                    f"{joins['queued']} waiting (peak {joins['peak']}), {joins['workers']} workers\n"
+                    f"{joins['processed']} auto-roled, {joins['failed']} failed, "
+                    f"avg wait {joins['avg_wait']:.1f}s"
+                ),
+                inline=False
+            )
+
+        roles = role_queue.stats()
+        sources = ", ".join(f"{source} {count}" for source, count in roles["by_source"].items()) or "none yet"
+        embed.add_field(
+            name="🎭 Role Changes",
+            value=(
+                f"{roles['requested']} requests in {roles['rest_calls']} REST calls "
+                f"({roles['retries']} retries, {roles['failed']} failed)\nBy source: {sources}"
+            ),
+            inline=False
+        )
+
+        io_lines = [
+            f"`{os.path.basename(path)}`: {counts['reads']} reads, {counts['writes']} writes"
+            for path, counts in settings_store.stats().items()
+        ]
+        embed.add_field(
+            name=f"💾 Settings Disk I/O (watcher: {settings_watcher.mode})",
+            value="\n".join(io_lines)[:1024] if io_lines else "None",
+            inline=False
+        )
+
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="reloadsettings", description="Reload all settings from disk")
     @app_commands.checks.has_permissions(administrator=True)
     async def reloadsettings(self, interaction: discord.Interaction):
         try:
-            # Reload sticky settings
-            sticky_cog = self.bot.get_cog("StickySystem")
-            if sticky_cog:
-                sticky_cog.sticky_channels = self.load_json(STICKY_PATH) or []
-
-            # Reload bad word settings
-            bad_cog = self.bot.get_cog("BadWordFilter")
-            if bad_cog:
-                bad_cog.settings = self.load_json(BADWORD_PATH) or {"words": [], "ignored_channels": []}
+            # Flush pending writes first so nothing saved moments ago is lost,
+            # then re-read every settings file; cogs rebuild through their subscriptions
+            await settings_store.flush()
+            settings_store.reload_all()
 
             await interaction.response.send_message("🔁 All settings reloaded from disk.", ephemeral=True)
 
@@ -1,25 +1,19 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
-import json
+from utils.deletion_queue import get_deletion_queue
 from utils.logger import log_action
+from utils.pipeline import get_pipeline
+from utils.policy import id_set
+from utils.settings_store import settings_store
 
 STICKY_PATH = "data/settings/sticky_channels.json"
 
 def load_sticky_config():
-    if os.path.exists(STICKY_PATH):
-        with open(STICKY_PATH, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return []
-    return []
+    return settings_store.load(STICKY_PATH, [])
 
 def save_sticky_config(data):
-    os.makedirs(os.path.dirname(STICKY_PATH), exist_ok=True)
-    with open(STICKY_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+    settings_store.save(STICKY_PATH, data)
 
 REMINDER_TEXT = (
     "📌 **PLEASE DO NOT TEXT HERE , IT IS POST ONLY CHANNEL .**\n"
@@ -30,22 +24,23 @@ class StickySystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.sticky_channels = load_sticky_config()
+        self.compile_policy()
         self.last_reminder_messages = {}  # {channel_id: message}
 
-    def is_valid_post(self, message: discord.Message):
-        if message.attachments:
+    def compile_policy(self, settings=None):
+        self.sticky_ids = id_set(self.sticky_channels)
+
+    def is_valid_post(self, ctx):
+        if ctx.message.attachments:
             return True
-        if any(url in message.content.lower() for url in ["http://", "https://"]):
+        if any(url in ctx.lowered for url in ["http://", "https://"]):
             return True
         return False
 
     async def send_reminder(self, channel: discord.TextChannel):
         try:
             if channel.id in self.last_reminder_messages:
-                try:
-                    await self.last_reminder_messages[channel.id].delete()
-                except (discord.NotFound, discord.Forbidden):
-                    pass
+                get_deletion_queue(self.bot).delete(self.last_reminder_messages[channel.id])
 
             new_msg = await channel.send(REMINDER_TEXT)
             self.last_reminder_messages[channel.id] = new_msg
@@ -53,18 +48,23 @@ class StickySystem(commands.Cog):
         except (discord.Forbidden, discord.HTTPException):
             pass
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot or not message.guild:
-            return
+    async def cog_load(self):
+        get_pipeline(self.bot).register("sticky_system", self.moderate)
+        settings_store.subscribe(STICKY_PATH, self.compile_policy)
+
+    async def cog_unload(self):
+        get_pipeline(self.bot).unregister("sticky_system")
+        settings_store.unsubscribe(STICKY_PATH, self.compile_policy)
 
+    async def moderate(self, ctx):
+        message = ctx.message
         if isinstance(message.channel, discord.Thread):
             return
 
-        if str(message.channel.id) not in self.sticky_channels:
+        if message.channel.id not in self.sticky_ids:
             return
 
-        if self.is_valid_post(message):
+        if self.is_valid_post(ctx):
             try:
                 await message.create_thread(
                     name=f"Discussion with {message.author.display_name}",
@@ -76,10 +76,7 @@ class StickySystem(commands.Cog):
             await self.send_reminder(message.channel)
             return
 
-        try:
-            await message.delete()
-        except (discord.Forbidden, discord.HTTPException):
-            pass
+        await ctx.delete()
 
         try:
             await log_action(
@@ -109,6 +106,7 @@ class StickySystem(commands.Cog):
 
         self.sticky_channels.append(ch_id)
         save_sticky_config(self.sticky_channels)
+        self.compile_policy()
         await interaction.response.send_message("✅ Sticky note mode enabled in this channel.", ephemeral=True)
 
     @app_commands.command(name="disablesticky", description="Disable sticky note mode in this channel")
@@ -123,6 +121,7 @@ class StickySystem(commands.Cog):
 
         self.sticky_channels.remove(ch_id)
         save_sticky_config(self.sticky_channels)
+        self.compile_policy()
         await interaction.response.send_message("✅ Sticky note mode disabled in this channel.", ephemeral=True)
 
     @enablesticky.error
@@ -2,20 +2,17 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+
+from utils.role_queue import role_queue
+from utils.settings_store import settings_store
 
 TICKET_CONFIG_PATH = "data/settings/ticket.json"
 
 def load_config():
-    if os.path.exists(TICKET_CONFIG_PATH):
-        with open(TICKET_CONFIG_PATH, "r") as f:
-            return json.load(f)
-    return {}
+    return settings_store.load(TICKET_CONFIG_PATH, {})
 
 def save_config(config):
-    with open(TICKET_CONFIG_PATH, "w") as f:
-        json.dump(config, f, indent=4)
+    settings_store.save(TICKET_CONFIG_PATH, config)
 
 class Ticket(commands.Cog):
     def __init__(self, bot):
@@ -61,7 +58,7 @@ class Ticket(commands.Cog):
             return
 
         if help_role in member.roles:
-            await member.remove_roles(help_role, reason="Ticket resolved")
+            await role_queue.apply(member, remove=[help_role], source="ticket", reason="Ticket resolved")
             try:
                 await member.send(f"🎫 Your ticket in **{interaction.guild.name}** has been resolved. The help role was removed.")
             except discord.Forbidden:
@@ -97,7 +94,7 @@ class TicketButton(discord.ui.View):
             return
 
         try:
-            await interaction.user.add_roles(help_role, reason="Requested help")
+            await role_queue.apply(interaction.user, add=[help_role], source="ticket", reason="Requested help")
             try:
                 await interaction.user.send("✅ Help role granted! Please check the help channel.")
             except discord.Forbidden:
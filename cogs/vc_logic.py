@@ -1,27 +1,152 @@
 import discord
 from discord.ext import commands
 import asyncio
-import json
-import os
 
-active_vcs = {}
+from utils.deadline_timer import DeadlineTimer
+from utils.role_queue import role_queue
+from utils.settings_store import settings_store
 
 VCROLE_PATH = "data/settings/vcrole.json"
-LOG_PATH = "data/settings/logchannel.json"
-
-# Load saved VC roles
-if os.path.exists(VCROLE_PATH):
-    with open(VCROLE_PATH, "r") as f:
-        vc_roles = json.load(f)
-else:
-    vc_roles = {}
-
-# Load log channel settings
-if os.path.exists(LOG_PATH):
-    with open(LOG_PATH, "r") as f:
-        log_channels = json.load(f)
-else:
-    log_channels = {}
+LOG_PATH = "data/settings/log_channel.json"
+ACTIVE_VCS_PATH = "data/settings/active_vcs.json"
+RECONCILE_CONCURRENCY = 5  # leftover VCs deleted at once on startup
+VC_POOL_PATH = "data/settings/vc_pool.json"  # str(guild_id): {str(category_id): pool size}
+POOL_CHANNEL_NAME = "warm-vc"
+POOL_MAX_SIZE = 10
+POOL_CREATES_PER_MINUTE = 5  # per guild; leaves headroom under Discord's channel-create limit
+
+# str(channel_id): {"creator_id", "guild_id"}; persisted so channels survive a restart
+active_vcs = settings_store.load(ACTIVE_VCS_PATH, {})
+
+def is_temp_vc(channel) -> bool:
+    return channel is not None and str(channel.id) in active_vcs
+
+def track_vc(channel: discord.VoiceChannel, creator_id: int):
+    active_vcs[str(channel.id)] = {"creator_id": creator_id, "guild_id": channel.guild.id}
+    settings_store.save(ACTIVE_VCS_PATH)
+
+def untrack_vc(channel_id: int):
+    if active_vcs.pop(str(channel_id), None) is not None:
+        settings_store.save(ACTIVE_VCS_PATH)
+
+CREATE_GRACE = 20  # seconds a new VC may stay empty before its creator joins
+EMPTY_GRACE = 10   # seconds an emptied VC waits for someone to rejoin before it is deleted
+ROLE_DEBOUNCE = 3  # seconds a member's voice state must stay put before their VC role is updated
+
+def pool_sizes(guild_id: int) -> dict:
+    return settings_store.load(VC_POOL_PATH, {}).get(str(guild_id), {})
+
+class VCPool:
+    """Optional per-category pool of hidden voice channels created ahead of time.
+
+    Handing one out is a single edit (name, permissions, limit) instead of a
+    create, so the user is moved in right away. The pool is topped back up in
+    the background, at most POOL_CREATES_PER_MINUTE channels per guild.
+    """
+
+    def __init__(self):
+        self.idle = {}     # category_id: [channel_id, ...]
+        self.refills = {}  # guild_id: refill task
+        self.deletes = set()  # delete tasks for trimmed channels
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+
+    def target(self, category: discord.CategoryChannel) -> int:
+        return min(int(pool_sizes(category.guild.id).get(str(category.id), 0)), POOL_MAX_SIZE)
+
+    async def take(self, category: discord.CategoryChannel, **edits):
+        """Hand out a ready channel with `edits` applied, or None if the pool is off or empty."""
+        if category is None or not self.target(category):
+            return None
+
+        guild = category.guild
+        idle = self.idle.get(category.id, [])
+        while idle:
+            channel = guild.get_channel(idle.pop())
+            if channel is None or channel.members:
+                continue
+            try:
+                await channel.edit(**edits, reason="Handed out from VC pool")
+            except discord.HTTPException as e:
+                print(f"⚠️ Failed to hand out pooled VC {channel.id}: {e}")
+                continue
+            self.hits += 1
+            self.refill(guild)
+            return channel
+
+        self.misses += 1
+        self.refill(guild)
+        return None
+
+    def restore(self, guild: discord.Guild):
+        """Adopt pool channels left from before a restart, then top the pools up."""
+        for category_id in pool_sizes(guild.id):
+            category = guild.get_channel(int(category_id))
+            if not isinstance(category, discord.CategoryChannel):
+                continue
+            self.idle[category.id] = [
+                channel.id for channel in category.voice_channels
+                if channel.name == POOL_CHANNEL_NAME and not channel.members and not is_temp_vc(channel)
+            ]
+            self.resize(category)
+
+    def resize(self, category: discord.CategoryChannel):
+        """Delete idle channels above the category's pool size and refill anything below it."""
+        idle = self.idle.setdefault(category.id, [])
+        target = self.target(category)
+        excess, idle[:] = idle[target:], idle[:target]
+        for channel_id in excess:
+            channel = category.guild.get_channel(channel_id)
+            if channel is not None:
+                task = asyncio.create_task(self._delete(channel))
+                self.deletes.add(task)
+                task.add_done_callback(self.deletes.discard)
+        self.refill(category.guild)
+
+    def refill(self, guild: discord.Guild):
+        task = self.refills.get(guild.id)
+        if task is None or task.done():
+            self.refills[guild.id] = asyncio.create_task(self._refill(guild))
+
+    def _next_short(self, guild: discord.Guild):
+        for category_id in pool_sizes(guild.id):
+            category = guild.get_channel(int(category_id))
+            if isinstance(category, discord.CategoryChannel) and len(self.idle.get(category.id, [])) < self.target(category):
+                return category
+        return None
+
+    async def _refill(self, guild: discord.Guild):
+        while (category := self._next_short(guild)) is not None:
+            try:
+                channel = await guild.create_voice_channel(
+                    name=POOL_CHANNEL_NAME,
+                    category=category,
+                    overwrites={guild.default_role: discord.PermissionOverwrite(connect=False, view_channel=False)},
+                    reason="VC pool refill"
+                )
+            except discord.HTTPException as e:
+                print(f"❌ Failed to refill VC pool in {category.name}: {e}")
+                return
+            self.idle.setdefault(category.id, []).append(channel.id)
+            self.created += 1
+            await asyncio.sleep(60 / POOL_CREATES_PER_MINUTE)
+
+    async def _delete(self, channel: discord.VoiceChannel):
+        try:
+            await channel.delete(reason="VC pool shrunk")
+        except discord.HTTPException as e:
+            print(f"⚠️ Failed to delete pooled VC {channel.id}: {e}")
+
+    def stats(self):
+        return {
+            "idle": sum(len(ids) for ids in self.idle.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "created": self.created,
+        }
+
+vc_pool = VCPool()
 
 async def create_voice_channel(bot: commands.Bot, guild: discord.Guild, user: discord.User,
                                channel: discord.TextChannel, category: discord.CategoryChannel,
@@ -40,13 +165,20 @@ async def create_voice_channel(bot: commands.Bot, guild: discord.Guild, user: di
             guild.default_role: discord.PermissionOverwrite(connect=True, view_channel=True)
         }
 
-    # Create VC
-    voice_channel = await guild.create_voice_channel(
-        name=vc_name,
-        category=category,
-        overwrites=overwrites,
-        user_limit=user_limit
-    )
+    # Take a pre-created VC if the category has a pool, otherwise create one
+    voice_channel = await vc_pool.take(category, name=vc_name, overwrites=overwrites, user_limit=user_limit)
+    if voice_channel is None:
+        voice_channel = await guild.create_voice_channel(
+            name=vc_name,
+            category=category,
+            overwrites=overwrites,
+            user_limit=user_limit
+        )
+
+    # Track VC before moving the user, so the join event already sees it as bot-created
+    track_vc(voice_channel, user.id)
+    # Deleted unless someone joins in time; the join cancels this
+    cleanup_timer.schedule(voice_channel, CREATE_GRACE)
 
     # Move user to VC
     try:
@@ -55,62 +187,132 @@ async def create_voice_channel(bot: commands.Bot, guild: discord.Guild, user: di
     except Exception as e:
         print(f"❌ Failed to move user: {e}")
 
-    # Track VC
-    active_vcs[voice_channel.id] = {
-        "creator_id": user.id,
-        "guild_id": guild.id
-    }
-
     # Log VC creation
     await log_vc_creation(bot, guild.id, user, voice_channel.name, vc_type, user_limit)
 
-    # Auto-delete task
-    bot.loop.create_task(auto_delete_vc(bot, voice_channel))
+async def delete_if_empty(voice_channel: discord.VoiceChannel):
+    if not is_temp_vc(voice_channel):
+        return
+    channel = voice_channel.guild.get_channel(voice_channel.id)
+    if channel is None:
+        untrack_vc(voice_channel.id)
+        return
+    if channel.members:
+        return  # someone came back; their leave will schedule it again
 
-async def auto_delete_vc(bot: commands.Bot, voice_channel: discord.VoiceChannel):
-    await asyncio.sleep(10)
-    while True:
-        await asyncio.sleep(10)
-        try:
-            if len(voice_channel.members) == 0:
-                await voice_channel.delete()
-                active_vcs.pop(voice_channel.id, None)
-                print(f"🗑️ Deleted empty VC: {voice_channel.name}")
-                break
-        except Exception as e:
-            print(f"❌ Error deleting VC: {e}")
-            break
+    try:
+        await channel.delete(reason="Temporary VC is empty")
+        print(f"🗑️ Deleted empty VC: {channel.name}")
+    except discord.NotFound:
+        pass
+    except Exception as e:
+        print(f"❌ Error deleting VC: {e}")
+        return
+    untrack_vc(channel.id)
+
+# One timer for every empty temporary VC, instead of a polling task per channel
+cleanup_timer = DeadlineTimer(delete_if_empty)
+
+def track_occupancy(before: discord.VoiceState, after: discord.VoiceState):
+    if before.channel == after.channel:
+        return  # mute/deafen/stream changes
+    if is_temp_vc(after.channel):
+        cleanup_timer.cancel(after.channel)
+    # The voice cache is updated before the event fires, so this no longer counts the member
+    if is_temp_vc(before.channel) and not before.channel.members:
+        cleanup_timer.schedule(before.channel, EMPTY_GRACE)
+
+async def reconcile_active_vcs(bot: commands.Bot):
+    """Match the persisted VCs against the guild caches after a restart.
+
+    Empty leftovers are deleted (a few at a time), occupied ones stay tracked
+    and get cleaned up by the usual leave events, and channels that no longer
+    exist are forgotten.
+    """
+    tracked = {}  # guild_id: set of channel ids
+    for channel_id, info in active_vcs.items():
+        tracked.setdefault(info["guild_id"], set()).add(int(channel_id))
+
+    empty, occupied = [], 0
+    for guild_id, channel_ids in tracked.items():
+        guild = bot.get_guild(guild_id)
+        if guild is None or guild.unavailable:
+            continue  # outage or left the guild; keep the entries until it's back
+
+        found = set()
+        for channel in guild.voice_channels:
+            if channel.id not in channel_ids:
+                continue
+            found.add(channel.id)
+            if channel.members:
+                occupied += 1
+            else:
+                empty.append(channel)
+        for channel_id in channel_ids - found:
+            untrack_vc(channel_id)
+
+    semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+    async def delete(channel):
+        async with semaphore:
+            await delete_if_empty(channel)
+
+    await asyncio.gather(*(delete(channel) for channel in empty))
+    if empty or occupied:
+        print(f"🎧 Reconciled temporary VCs: {len(empty)} empty deleted, {occupied} still in use")
+
+    for guild in bot.guilds:
+        vc_pool.restore(guild)
+
+def get_vc_role(guild: discord.Guild):
+    role_id = settings_store.load(VCROLE_PATH, {}).get(str(guild.id))
+    return guild.get_role(role_id) if role_id else None
+
+async def sync_vc_role(key):
+    """Give or take the VC role so it matches where the member ended up."""
+    guild, member_id = key
+    member = guild.get_member(member_id)
+    role = get_vc_role(guild)
+    if member is None or role is None:
+        return
+
+    in_temp_vc = member.voice is not None and is_temp_vc(member.voice.channel)
+    has_role = role in member.roles
+    try:
+        # User is in a VC created by bot
+        if in_temp_vc and not has_role:
+            vc_role_stats["edits"] += 1
+            await role_queue.apply(member, add=[role], source="vcrole", reason="Joined bot-created VC")
+        # User left the bot-created VCs
+        elif has_role and not in_temp_vc:
+            vc_role_stats["edits"] += 1
+            await role_queue.apply(member, remove=[role], source="vcrole", reason="Left bot-created VC")
+    except Exception as e:
+        print(f"❌ Failed to update VC role: {e}")
+
+# One pending role sync per (guild, member id); every voice event pushes it back,
+# so hopping or reconnecting costs at most one role edit once things settle
+role_timer = DeadlineTimer(sync_vc_role)
+vc_role_stats = {"events": 0, "edits": 0}
 
 # Handle VC join/leave role
 async def handle_vc_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-    guild_id = str(member.guild.id)
-    role_id = vc_roles.get(guild_id)
+    track_occupancy(before, after)
 
-    if not role_id:
+    if before.channel == after.channel:
+        return  # mute/deafen/stream changes
+    if not (is_temp_vc(before.channel) or is_temp_vc(after.channel)):
         return
-
-    role = member.guild.get_role(role_id)
-    if not role:
+    if get_vc_role(member.guild) is None:
         return
 
-    # User joins a VC created by bot
-    if after.channel and after.channel.id in active_vcs:
-        try:
-            await member.add_roles(role, reason="Joined bot-created VC")
-        except Exception as e:
-            print(f"❌ Failed to add VC role: {e}")
-
-    # User leaves a VC created by bot
-    elif before.channel and before.channel.id in active_vcs:
-        try:
-            await member.remove_roles(role, reason="Left bot-created VC")
-        except Exception as e:
-            print(f"❌ Failed to remove VC role: {e}")
+    vc_role_stats["events"] += 1
+    role_timer.schedule((member.guild, member.id), ROLE_DEBOUNCE)
 
 # Log VC creation
 async def log_vc_creation(bot, guild_id, user, vc_name, vc_type, user_limit):
     guild_id = str(guild_id)
-    log_channel_id = log_channels.get(guild_id)
+    log_channel_id = settings_store.load(LOG_PATH, {}).get(guild_id)
     if not log_channel_id:
         return
 
@@ -1,8 +1,9 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+
+from cogs.vc_logic import POOL_MAX_SIZE, VC_POOL_PATH, vc_pool
+from utils.settings_store import settings_store
 
 VCROLE_PATH = "data/settings/vcrole.json"
 
@@ -11,10 +12,7 @@ class VCRole(commands.Cog):
         self.bot = bot
 
         # Ensure storage exists
-        os.makedirs("data/settings", exist_ok=True)
-        if not os.path.exists(VCROLE_PATH):
-            with open(VCROLE_PATH, "w") as f:
-                json.dump({}, f)
+        settings_store.load(VCROLE_PATH, {})
 
     @app_commands.command(name="setvcrole", description="Set a role to be given when users join VC created by bot")
     @app_commands.describe(role="Select the role to assign when user joins VC")
@@ -24,13 +22,35 @@ class VCRole(commands.Cog):
             return
 
         # Save role
-        with open(VCROLE_PATH, "r") as f:
-            data = json.load(f)
+        data = settings_store.load(VCROLE_PATH, {})
         data[str(interaction.guild.id)] = role.id
-        with open(VCROLE_PATH, "w") as f:
-            json.dump(data, f, indent=4)
+        settings_store.save(VCROLE_PATH, data)
 
         await interaction.response.send_message(f"✅ VC role set to {role.mention}", ephemeral=True)
 
+    @app_commands.command(name="setvcpool", description="Keep hidden voice channels ready in a category for instant VC creation")
+    @app_commands.describe(category="Category the VC button is used in", size="How many channels to keep ready (0 turns the pool off)")
+    async def setvcpool(self, interaction: discord.Interaction, category: discord.CategoryChannel,
+                        size: app_commands.Range[int, 0, POOL_MAX_SIZE]):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("🚫 You must be an admin to use this command.", ephemeral=True)
+            return
+
+        data = settings_store.load(VC_POOL_PATH, {})
+        sizes = data.setdefault(str(interaction.guild.id), {})
+        if size:
+            sizes[str(category.id)] = size
+        else:
+            sizes.pop(str(category.id), None)
+        settings_store.save(VC_POOL_PATH, data)
+
+        # Trims extra channels now; new ones are created in the background
+        vc_pool.resize(category)
+
+        if size:
+            await interaction.response.send_message(f"✅ Keeping {size} voice channel(s) ready in **{category.name}**", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"✅ VC pool disabled in **{category.name}**", ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(VCRole(bot))
@@ -1,37 +1,29 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
-import json
-import asyncio
 
 from utils.logger import log_action
+from utils.role_queue import role_queue
+from utils.settings_store import settings_store
 
 VERIFY_CONFIG_PATH = "data/settings/verify.json"
 
 def load_config():
-    if not os.path.exists(VERIFY_CONFIG_PATH):
-        os.makedirs(os.path.dirname(VERIFY_CONFIG_PATH), exist_ok=True)
-        with open(VERIFY_CONFIG_PATH, "w") as f:
-            json.dump({}, f)
-    with open(VERIFY_CONFIG_PATH, "r") as f:
-        return json.load(f)
+    return settings_store.load(VERIFY_CONFIG_PATH, {})
 
 def save_config(data):
-    with open(VERIFY_CONFIG_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+    settings_store.save(VERIFY_CONFIG_PATH, data)
 
 class VerifyButton(discord.ui.View):
-    def __init__(self, role_id: int):
+    """Persistent verify panel; registered in setup_hook so old panels keep working after a restart."""
+
+    def __init__(self):
         super().__init__(timeout=None)
-        self.role_id = role_id
 
     @discord.ui.button(label="✅ Verify", style=discord.ButtonStyle.success, custom_id="verify_button")
     async def verify(self, interaction: discord.Interaction, button: discord.ui.Button):
-        config = load_config()
-        guild_id = str(interaction.guild.id)
-
-        role_id = config.get(guild_id)
+        # The role comes from the cached config, not from the panel, so /setverifyrole applies to old panels too
+        role_id = load_config().get(str(interaction.guild.id))
         if not role_id:
             await interaction.response.send_message("⚠️ Verification role not configured.", ephemeral=True)
             return
@@ -43,24 +35,32 @@ class VerifyButton(discord.ui.View):
 
         if role in interaction.user.roles:
             await interaction.response.send_message("✅ You are already verified!", ephemeral=True)
-        else:
-            await interaction.response.defer(ephemeral=True)  # Prevent crash
-            try:
-                await interaction.user.add_roles(role)
-
-                # ✅ Send public confirmation and auto-delete it
-                msg = await interaction.channel.send(f"{interaction.user.mention} 🎉 You are now verified!")
-                await log_action(
-                    interaction.client,
-                    interaction.guild,
-                    title="✅ Member Verified",
-                    content=f"{interaction.user.mention} has been verified and given {role.mention}.",
-                    user=interaction.user
-                )
-                await asyncio.sleep(5)
-                await msg.delete()
-            except discord.Forbidden:
-                await interaction.followup.send("❌ I don't have permission to give roles.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)  # the grant is queued and may take a moment
+        try:
+            await role_queue.apply(interaction.user, add=[role], source="verify", reason="Verified")
+        except discord.Forbidden:
+            await interaction.followup.send("❌ I don't have permission to give roles.", ephemeral=True)
+            return
+        except discord.HTTPException as e:
+            print(f"❌ Failed to verify {interaction.user}: {e}")
+            await interaction.followup.send("❌ Verification failed, please try again in a moment.", ephemeral=True)
+            return
+
+        # Their auto-roles jump the join queue too
+        auto_roles = interaction.client.get_cog("AutoRoles")
+        if auto_roles:
+            auto_roles.prioritize(interaction.user)
+
+        await interaction.followup.send("🎉 You are now verified!", ephemeral=True)
+        await log_action(
+            interaction.client,
+            interaction.guild,
+            title="✅ Member Verified",
+            content=f"{interaction.user.mention} has been verified and given {role.mention}.",
+            user=interaction.user
+        )
 
 class VerifySystem(commands.Cog):
     def __init__(self, bot):
@@ -89,7 +89,7 @@ class VerifySystem(commands.Cog):
             description="Click the button below to verify and get access to the server.",
             color=0x2ecc71
         )
-        view = VerifyButton(role_id=role_id)
+        view = VerifyButton()
         await interaction.channel.send(embed=embed, view=view)
         await interaction.response.send_message("✅ Verification panel sent.", ephemeral=True)
 
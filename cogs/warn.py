@@ -1,30 +1,90 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+import datetime
+
+from utils.settings_store import settings_store
+from utils.warn_store import WarnStore
 
-WARN_DATA_PATH = "data/warnings/warn_data.json"
 WARN_LOG_PATH = "data/warnings/warn_log_channel.json"
+PAGE_SIZE = 10
 
 def load_json(path, default):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    if not os.path.exists(path):
-        with open(path, "w") as f:
-            json.dump(default, f, indent=4)
-    with open(path, "r") as f:
-        return json.load(f)
+    return settings_store.load(path, default)
 
 def save_json(path, data):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+    settings_store.save(path, data)
+
+def parse_date(value: str) -> float:
+    """YYYY-MM-DD (UTC) to a timestamp."""
+    date = datetime.datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    return date.timestamp()
+
+class WarnPages(discord.ui.View):
+    """Pages through a member's warnings, fetching one page per click with a keyset cursor."""
+
+    def __init__(self, store, guild_id: int, user: discord.Member, author_id: int, total: int, filters: dict):
+        super().__init__(timeout=300)
+        self.store = store
+        self.guild_id = guild_id
+        self.user = user
+        self.author_id = author_id
+        self.total = total
+        self.filters = filters
+        self.cursors = [None]  # start cursor of every page up to the current one
+        self.rows = []
+
+    async def load(self):
+        rows = await self.store.page(self.guild_id, self.user.id, self.cursors[-1], PAGE_SIZE + 1, **self.filters)
+        self.rows = rows[:PAGE_SIZE]
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = len(rows) <= PAGE_SIZE
+
+    def embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"⚠️ Warnings for {self.user}", color=discord.Color.yellow())
+        start = (len(self.cursors) - 1) * PAGE_SIZE
+        for idx, warn in enumerate(self.rows, start=start + 1):
+            when = f"\n**When:** <t:{int(warn['created_at'])}:d>" if warn["created_at"] else ""
+            embed.add_field(name=f"#{idx}", value=f"**Reason:** {warn['reason']}\n**By:** {warn['moderator']}{when}", inline=False)
+
+        pages = max((self.total + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        footer = f"Page {len(self.cursors)}/{pages} • {self.total} warnings"
+        if self.filters:
+            footer += " (filtered, numbers don't match /removewarn)"
+        embed.set_footer(text=footer)
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("🚫 Only the person who ran this command can page through it.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursors.pop()
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last = self.rows[-1]
+        self.cursors.append((last["created_at"], last["id"]))
+        await self.load()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
 
 class WarnSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.warn_data = load_json(WARN_DATA_PATH, {})
+        self.store = WarnStore()
+        imported = self.store.import_legacy_json()
+        if imported:
+            print(f"📥 Imported {imported} warnings from warn_data.json")
         self.log_channel_data = load_json(WARN_LOG_PATH, {})
 
+    async def cog_unload(self):
+        self.store.close()
+
     def is_admin(self, user: discord.Member):
         config = load_json("data/config.json", {})
         admin_role_id = config.get("admin_role_id")
@@ -36,15 +96,7 @@ class WarnSystem(commands.Cog):
         if not self.is_admin(interaction.user):
             return await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
 
-        uid = str(user.id)
-        if uid not in self.warn_data:
-            self.warn_data[uid] = []
-
-        self.warn_data[uid].append({
-            "reason": reason,
-            "moderator": str(interaction.user),
-        })
-        save_json(WARN_DATA_PATH, self.warn_data)
+        await self.store.add(interaction.guild.id, user.id, str(interaction.user), interaction.user.id, reason)
 
         # DM the user
         try:
@@ -66,18 +118,33 @@ class WarnSystem(commands.Cog):
                 await log_channel.send(embed=embed)
 
     @app_commands.command(name="warnstatus", description="View warnings of a user.")
-    async def warnstatus(self, interaction: discord.Interaction, user: discord.Member):
-        uid = str(user.id)
-        warns = self.warn_data.get(uid, [])
-
-        if not warns:
-            return await interaction.response.send_message(f"✅ {user.mention} has no warnings.", ephemeral=True)
-
-        embed = discord.Embed(title=f"⚠️ Warnings for {user}", color=discord.Color.yellow())
-        for idx, warn in enumerate(warns, start=1):
-            embed.add_field(name=f"#{idx}", value=f"**Reason:** {warn['reason']}\n**By:** {warn['moderator']}", inline=False)
-
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+    @app_commands.describe(
+        user="User to look up",
+        moderator="Only warnings issued by this moderator",
+        since="Only warnings on or after this date (YYYY-MM-DD)",
+        until="Only warnings on or before this date (YYYY-MM-DD)"
+    )
+    async def warnstatus(self, interaction: discord.Interaction, user: discord.Member,
+                         moderator: discord.Member = None, since: str = None, until: str = None):
+        filters = {}
+        try:
+            if moderator:
+                filters["moderator_id"] = moderator.id
+            if since:
+                filters["since"] = parse_date(since)
+            if until:
+                filters["until"] = parse_date(until) + 86400  # include the whole day
+        except ValueError:
+            return await interaction.response.send_message("⚠️ Dates must look like `2024-01-31`.", ephemeral=True)
+
+        total = await self.store.count(interaction.guild.id, user.id, **filters)
+        if not total:
+            suffix = " matching those filters" if filters else ""
+            return await interaction.response.send_message(f"✅ {user.mention} has no warnings{suffix}.", ephemeral=True)
+
+        view = WarnPages(self.store, interaction.guild.id, user, interaction.user.id, total, filters)
+        await view.load()
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
 
     @app_commands.command(name="removewarn", description="Remove a specific warning by number")
     @app_commands.describe(user="User to remove warning from", index="Warning number to remove (1, 2...)")
@@ -85,15 +152,10 @@ class WarnSystem(commands.Cog):
         if not self.is_admin(interaction.user):
             return await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
 
-        uid = str(user.id)
-        if uid not in self.warn_data or index < 1 or index > len(self.warn_data[uid]):
+        removed = await self.store.remove_nth(interaction.guild.id, user.id, index)
+        if removed is None:
             return await interaction.response.send_message("⚠️ Invalid warning index.", ephemeral=True)
 
-        removed = self.warn_data[uid].pop(index - 1)
-        if not self.warn_data[uid]:
-            del self.warn_data[uid]
-
-        save_json(WARN_DATA_PATH, self.warn_data)
         await interaction.response.send_message(f"✅ Removed warning #{index} from {user.mention}: `{removed['reason']}`", ephemeral=True)
 
     @app_commands.command(name="setwarnlog", description="Set the channel to log warnings.")
@@ -30,21 +30,32 @@ bot = commands.Bot(
 )
 
 # ✅ Import persistent views from cogs
-from cogs.vc_logic import handle_vc_update
+from cogs.vc_logic import handle_vc_update, reconcile_active_vcs
 from cogs.vc_create import VCButtonView
 from cogs.ticket import TicketButton
+from cogs.verify import VerifyButton
+from utils.settings_store import settings_store
+from utils.settings_watcher import settings_watcher
 
 # ✅ Setup persistent views (required after bot restarts)
 @bot.event
 async def setup_hook():
     bot.add_view(VCButtonView())
     bot.add_view(TicketButton())
+    bot.add_view(VerifyButton())
+    settings_watcher.start()
 
 # ✅ On bot ready: Print bot info
 @bot.event
 async def on_ready():
     print(f"✅ Logged in as {bot.user} ({bot.user.id})")
 
+    # ✅ Pick up temporary VCs created before the restart
+    try:
+        await reconcile_active_vcs(bot)
+    except Exception as e:
+        print(f"❌ Failed to reconcile temporary VCs: {e}")
+
     try:
         if config.get("test_guild_id"):
             test_guild = discord.Object(id=int(config["test_guild_id"]))
@@ -95,7 +106,11 @@ async def main():
             return
 
         print("🚀 Starting bot...")
-        await bot.start(token)
+        try:
+            await bot.start(token)
+        finally:
+            settings_watcher.stop()
+            await settings_store.flush()  # don't lose write-behind saves on shutdown
 
 # ✅ Run main entry point
 asyncio.run(main())
@@ -0,0 +1,84 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+class DeadlineTimer:
+    """Calls `callback(key)` once each key's deadline passes, using one task for every key.
+
+    Scheduling a key that is already pending moves its deadline and cancel()
+    drops it. Both are O(log n): stale heap entries are skipped when they
+    reach the front instead of being searched for.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback  # async callback(key)
+        self.deadlines = {}       # key: deadline (time.monotonic)
+        self.heap = []            # (deadline, seq, key), may hold stale entries
+        self.seq = itertools.count()  # tie-breaker so keys never need to be comparable
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.tasks = set()        # callbacks in flight; kept referenced and left to finish on stop()
+        self.fired = 0
+
+    def __contains__(self, key):
+        return key in self.deadlines
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, key, delay: float):
+        deadline = time.monotonic() + delay
+        self.deadlines[key] = deadline
+        seq = next(self.seq)
+        heapq.heappush(self.heap, (deadline, seq, key))
+        if len(self.heap) > 2 * len(self.deadlines) + 64:
+            self._compact()
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        elif self.heap[0][1] == seq:
+            self.wakeup.set()  # new earliest deadline; the sleeping task has to re-check
+
+    def cancel(self, key) -> bool:
+        return self.deadlines.pop(key, None) is not None
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.deadlines.clear()
+        self.heap.clear()
+
+    def _compact(self):
+        self.heap = [entry for entry in self.heap if self.deadlines.get(entry[2]) == entry[0]]
+        heapq.heapify(self.heap)
+
+    async def _run(self):
+        while self.heap:
+            deadline, _, key = self.heap[0]
+            if self.deadlines.get(key) != deadline:
+                heapq.heappop(self.heap)  # cancelled or rescheduled
+                continue
+
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            del self.deadlines[key]
+            self.fired += 1
+            task = asyncio.create_task(self._fire(key))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _fire(self, key):
+        try:
+            await self.callback(key)
+        except Exception as e:
+            print(f"❌ Timer callback failed for {key}: {e}")
@@ -0,0 +1,120 @@
+import discord
+import asyncio
+import datetime
+
+BATCH_WINDOW = 1.0  # seconds to gather deletions per channel
+BULK_LIMIT = 100    # Discord's bulk delete maximum
+# Bulk delete rejects messages older than 14 days; keep a margin for clock skew
+BULK_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=10)
+
+class DeletionQueue:
+    """Coalesces moderation deletions into one bulk-delete request per channel and window."""
+
+    def __init__(self, window: float = BATCH_WINDOW):
+        self.window = window
+        self.pending = {}  # channel_id: {message_id: (message, future)}
+        self.timers = {}   # channel_id: flush task
+        self.tasks = set() # flushes in flight; referenced so they can't be garbage-collected
+        self.requested = 0
+        self.rest_calls = 0
+        self.failed = 0
+
+    def delete(self, message: discord.Message) -> asyncio.Future:
+        """Queue a message for deletion.
+
+        Returns a future that resolves to True once the message is gone (or was
+        already gone) and False if deleting it failed. Awaiting it is optional.
+        """
+        channel_id = message.channel.id
+        batch = self.pending.setdefault(channel_id, {})
+        if message.id in batch:
+            return batch[message.id][1]
+        future = asyncio.get_running_loop().create_future()
+        batch[message.id] = (message, future)
+        self.requested += 1
+
+        if len(batch) >= BULK_LIMIT:
+            self._spawn(self.flush(channel_id))
+        elif channel_id not in self.timers:
+            self.timers[channel_id] = self._spawn(self._flush_later(channel_id))
+        return future
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _flush_later(self, channel_id: int):
+        await asyncio.sleep(self.window)
+        self.timers.pop(channel_id, None)
+        await self.flush(channel_id)
+
+    async def flush(self, channel_id: int):
+        batch = self.pending.pop(channel_id, None)
+        if not batch:
+            return
+        try:
+            failed = await self._delete_batch([message for message, _ in batch.values()])
+        except Exception as e:
+            print(f"❌ Deletion flush failed in channel {channel_id}: {e}")
+            failed = set(batch)
+        for message_id, (_, future) in batch.items():
+            if not future.done():
+                future.set_result(message_id not in failed)
+
+    async def _delete_batch(self, messages) -> set:
+        """Delete the messages, returning the ids that could not be deleted."""
+        channel = messages[0].channel
+        failed = set()
+
+        cutoff = discord.utils.utcnow() - BULK_MAX_AGE
+        recent = [m for m in messages if m.created_at > cutoff]
+        singles = [m for m in messages if m.created_at <= cutoff]
+
+        if not hasattr(channel, "delete_messages"):
+            singles, recent = messages, []
+
+        for i in range(0, len(recent), BULK_LIMIT):
+            chunk = recent[i:i + BULK_LIMIT]
+            if len(chunk) == 1:
+                singles.extend(chunk)
+                continue
+            try:
+                self.rest_calls += 1
+                await channel.delete_messages(chunk, reason="Moderation filter")
+            except discord.Forbidden:
+                self.failed += len(chunk)
+                failed.update(m.id for m in chunk)
+                print(f"❌ Missing permissions to delete messages in #{channel}")
+            except discord.HTTPException as e:
+                # One bad id fails the whole request; retry this chunk one by one
+                print(f"⚠️ Bulk delete failed in #{channel}, falling back to single deletes: {e}")
+                singles.extend(chunk)
+
+        for message in singles:
+            try:
+                self.rest_calls += 1
+                await message.delete()
+            except discord.NotFound:
+                pass
+            except (discord.Forbidden, discord.HTTPException) as e:
+                self.failed += 1
+                failed.add(message.id)
+                print(f"⚠️ Failed to delete message {message.id}: {e}")
+        return failed
+
+    def stats(self):
+        return {
+            "requested": self.requested,
+            "rest_calls": self.rest_calls,
+            "saved": max(self.requested - self.rest_calls, 0),
+            "failed": self.failed,
+        }
+
+def get_deletion_queue(bot) -> DeletionQueue:
+    queue = getattr(bot, "deletion_queue", None)
+    if queue is None:
+        queue = DeletionQueue()
+        bot.deletion_queue = queue
+    return queue
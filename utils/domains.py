@@ -0,0 +1,180 @@
+import mmap
+import os
+import re
+
+# Bare hosts (no scheme, no "www.") only count as links when they end in one of
+# these TLDs, so "main.py", "node.js" or "hi.how" in chat aren't treated as links.
+# TLDs that double as common file extensions (py, sh, md, rs, pl, so, zip, mov)
+# are left out on purpose; links to them still match with a scheme or "www.".
+BARE_TLDS = frozenset("""
+com net org edu gov mil int info biz name pro mobi asia eu
+io gg co me tv ai app dev xyz cc ws fm gl gd ly to ac im nu cx la vc ms
+site online store shop club live stream link click top fun space tech website
+icu pw tk ml ga cf gq one page blog news today world life art wiki lol wtf
+cloud digital network media studio games game gift codes bio chat social
+uk us ca au nz ie de fr it es nl be ch at se no fi dk is lu pt gr cz sk hu ro
+bg hr si lt lv ee ua by ru kz ge am tr il ir in jp cn kr hk tw sg my th vn id
+ph br ar mx cl pe za ng eg sa ae
+""".split())
+
+# TLDs that are also everyday words, so "went.to", "done.Is" or "wait.no" in chat
+# aren't links. A bare host ending in one of them needs "www." or a path ("t.me/abc").
+WORD_TLDS = frozenset("""
+is to no at me in it us be by my am id one pro name top fun art life live news
+today world page link click club shop store site space wiki lol wtf blog tech
+stream online website cloud digital network media studio games game gift codes
+bio chat social
+""".split())
+
+def has_path(link: str, host_length: int) -> bool:
+    """True if a bare match goes on past its host (and port) into a non-empty path, query or fragment."""
+    rest = link[host_length:]
+    if rest.startswith(":"):
+        rest = rest.lstrip(":0123456789")
+    return len(rest) > 1 and rest[0] in "/?#"
+
+# Either a URL with a scheme (any host) or a bare domain such as "discord.gg/abc"
+URL_REGEX = re.compile(
+    r"https?://(?P<authority>[^\s/?#<>]+)[^\s<>]*"
+    r"|(?<![\w.@/-])(?P<bare>(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,63})(?![\w-])(?::\d+)?(?:[/?#][^\s<>]*)?",
+    re.IGNORECASE
+)
+
+def host_from_authority(authority: str) -> str:
+    host = authority.rsplit("@", 1)[-1]  # drop user:password@
+    if host.startswith("["):
+        return host[1:host.find("]")]  # IPv6 literal
+    return host.split(":", 1)[0]
+
+def find_links(text: str):
+    """Yield (link, host) for every URL or bare domain in the text."""
+    for match in URL_REGEX.finditer(text):
+        authority = match.group("authority")
+        if authority is not None:
+            host = host_from_authority(authority).lower().strip(".")
+        else:
+            host = match.group("bare").lower()
+            if not host.startswith("www."):
+                tld = host.rsplit(".", 1)[-1]
+                if tld not in BARE_TLDS:
+                    continue  # file names and typos, not links
+                if tld in WORD_TLDS and not has_path(match.group(0), len(host)):
+                    continue  # words run together, not links
+        yield match.group(0), host
+
+def normalize_domain(domain: str) -> str:
+    """Reduce user input like "https://www.YouTube.com/watch" to "youtube.com"."""
+    domain = domain.strip().lower()
+    if "://" in domain:
+        domain = domain.split("://", 1)[1]
+    domain = re.split(r"[/?#]", domain, 1)[0]
+    domain = host_from_authority(domain).strip(".")
+    for prefix in ("*.", "www."):
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    return domain
+
+class DomainSet:
+    """Hashed suffix set: a host matches if it or any parent domain is listed.
+
+    "m.youtube.com" matches "youtube.com", "youtube.com.evil.net" does not.
+    Lookups cost one set probe per label, however long the list is.
+    """
+
+    def __init__(self, domains=()):
+        self.domains = frozenset(d for d in (normalize_domain(d) for d in domains) if d)
+
+    def __len__(self):
+        return len(self.domains)
+
+    def __contains__(self, host: str) -> bool:
+        domains = self.domains
+        if not domains:
+            return False
+        while True:
+            if host in domains:
+                return True
+            dot = host.find(".")
+            if dot == -1:
+                return False
+            host = host[dot + 1:]
+
+def parse_blocklist_line(line: str):
+    """Accept plain domains, hosts-file lines ("0.0.0.0 evil.com") and adblock rules ("||evil.com^")."""
+    line = line.split("#", 1)[0].strip()
+    if not line or line.startswith("!"):
+        return None
+    if line.startswith("||"):
+        line = line[2:].split("^", 1)[0]
+    parts = line.split()
+    if len(parts) >= 2 and parts[0] in ("0.0.0.0", "127.0.0.1", "::", "::1"):
+        line = parts[1]
+    else:
+        line = parts[0]
+    domain = normalize_domain(line)
+    return domain if "." in domain else None
+
+def build_sorted_domain_file(source_path: str, target_path: str) -> int:
+    """Compile a raw blocklist into a sorted, deduplicated file and swap it in atomically."""
+    with open(source_path, "r", encoding="utf-8", errors="ignore") as f:
+        domains = sorted({d for d in map(parse_blocklist_line, f) if d})
+
+    tmp_path = target_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write("\n".join(domains).encode("utf-8"))
+    os.replace(tmp_path, target_path)
+    return len(domains)
+
+class SortedDomainFile:
+    """Read-only domain set backed by a memory-mapped sorted file.
+
+    Opening costs one mmap call, lookups binary-search the mapped pages, so a
+    list with hundreds of thousands of domains stays out of the Python heap.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._count = None
+
+    def __len__(self):
+        if self._count is None:
+            size = len(self._map)
+            newlines = sum(self._map[i:i + (1 << 20)].count(b"\n") for i in range(0, size, 1 << 20))
+            self._count = newlines + 1 if size else 0
+        return self._count
+
+    def _has_line(self, key: bytes) -> bool:
+        data = self._map
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b"\n", 0, mid) + 1
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = len(data)
+            line = data[start:end]
+            if line == key:
+                return True
+            if line < key:
+                lo = end + 1
+            else:
+                hi = start
+        return False
+
+    def __contains__(self, host: str) -> bool:
+        if not len(self._map):
+            return False
+        key = host.encode("utf-8")
+        while b"." in key:  # every listed entry has at least two labels
+            if self._has_line(key):
+                return True
+            key = key[key.find(b".") + 1:]
+        return False
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,75 @@
+import copy
+import os
+
+from utils.settings_store import settings_store
+from utils.ttl_cache import TTLCache
+
+GUILD_DIR = "data/guilds"
+MAX_LOADED_GUILDS = 1000  # per namespace
+IDLE_TTL = 3600           # seconds an unused guild config stays in memory
+
+class GuildConfig:
+    """One settings namespace split into a JSON file per guild (data/guilds/<id>/<namespace>.json).
+
+    A guild's file is read the first time the guild is seen, kept in an LRU
+    cache, and dropped again after IDLE_TTL idle seconds, so memory and
+    startup cost follow active guilds rather than every guild the bot is in.
+    Guilds without a file start from `seed()` (used to migrate the old
+    process-wide settings) or from `defaults`.
+    """
+
+    def __init__(self, namespace: str, defaults: dict, seed=None,
+                 max_guilds: int = MAX_LOADED_GUILDS, idle_ttl: float = IDLE_TTL):
+        self.namespace = namespace
+        self.defaults = defaults
+        self.seed = seed
+        self.loaded = TTLCache(max_entries=max_guilds, ttl=idle_ttl, on_evict=self._evict)  # guild_id: data
+        self.callbacks = {}  # guild_id: store listener for that guild's file
+        self.listeners = []  # callback(guild_id) after a guild's file is reloaded from disk
+
+    def path(self, guild_id: int) -> str:
+        return os.path.join(GUILD_DIR, str(guild_id), f"{self.namespace}.json")
+
+    def get(self, guild_id: int) -> dict:
+        data = self.loaded.get(guild_id)
+        if data is not None:
+            # Throttled mtime check, in case the watcher is off; reloads update `data` in place
+            settings_store.load(self.path(guild_id))
+            return data
+
+        path = self.path(guild_id)
+        if path not in settings_store.cache and not os.path.exists(path) and self.seed:
+            default = self.seed()
+        else:
+            default = copy.deepcopy(self.defaults)
+        data = settings_store.load(path, default)
+
+        callback = self.callbacks[guild_id] = lambda _, gid=guild_id: self._reloaded(gid)
+        settings_store.subscribe(path, callback)
+        self.loaded.set(guild_id, data)
+        return data
+
+    def save(self, guild_id: int):
+        settings_store.save(self.path(guild_id), self.get(guild_id))
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _reloaded(self, guild_id: int):
+        for callback in list(self.listeners):
+            callback(guild_id)
+
+    def _evict(self, guild_id: int, data):
+        path = self.path(guild_id)
+        callback = self.callbacks.pop(guild_id, None)
+        if callback:
+            settings_store.unsubscribe(path, callback)
+        # A file with a pending write stays cached in the store; the next get() reuses it
+        settings_store.evict(path)
+
+    def stats(self):
+        return self.loaded.stats()
@@ -1,16 +1,91 @@
 import discord
-import json
-import os
+import asyncio
+
+from utils.settings_store import settings_store
 
 SETTINGS_PATH = "data/settings/log_channel.json"
 
+MAX_EMBEDS = 10          # embeds per message allowed by Discord
+MAX_EMBED_CHARS = 6000   # combined embed text allowed per message
+FLUSH_DELAY = 2.0        # seconds to gather log events before sending
+PING_FLUSH_DELAY = 0.5   # pinged alerts (spam) wait only briefly, and share one ping
+
 def get_log_channel_id(guild_id: int):
-    if not os.path.exists(SETTINGS_PATH):
-        return None
+    # Served from the shared settings cache, which /setlogchannel updates directly
+    return settings_store.load(SETTINGS_PATH, {}).get(str(guild_id))
+
+class LogBatcher:
+    """Per-guild queue that packs log embeds into as few messages as possible."""
+
+    def __init__(self):
+        self.pending = {}  # guild_id: [(channel, embed, ping)]
+        self.timers = {}   # guild_id: (flush task, deadline)
+        self.tasks = set() # sends and flushes in flight; referenced so they can't be garbage-collected
+        self.lost = 0      # batches dropped because sending raised
 
-    with open(SETTINGS_PATH, "r") as f:
-        data = json.load(f)
-        return data.get(str(guild_id))
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.lost += 1
+            print(f"❌ Log batch failed: {task.exception()!r}")
+
+    def add(self, guild_id: int, channel, embed: discord.Embed, ping: str = None):
+        batch = self.pending.setdefault(guild_id, [])
+        if batch and (
+            len(batch) >= MAX_EMBEDS
+            or batch[0][0].id != channel.id
+            or sum(len(e) for _, e, _ in batch) + len(embed) > MAX_EMBED_CHARS
+        ):
+            self._spawn(self.send(self.pending.pop(guild_id)))
+            batch = self.pending.setdefault(guild_id, [])
+
+        batch.append((channel, embed, ping))
+
+        if len(batch) >= MAX_EMBEDS:
+            self._spawn(self.flush(guild_id))
+        else:
+            # 🔔 A ping pulls the whole batch forward so alerts are never held back
+            self.schedule(guild_id, PING_FLUSH_DELAY if ping else FLUSH_DELAY)
+
+    def schedule(self, guild_id: int, delay: float):
+        deadline = asyncio.get_running_loop().time() + delay
+        timer = self.timers.get(guild_id)
+        if timer is not None:
+            if timer[1] <= deadline:
+                return
+            timer[0].cancel()
+        self.timers[guild_id] = (self._spawn(self._flush_later(guild_id, delay)), deadline)
+
+    async def _flush_later(self, guild_id: int, delay: float):
+        await asyncio.sleep(delay)
+        self.timers.pop(guild_id, None)
+        await self.flush(guild_id)
+
+    async def flush(self, guild_id: int):
+        batch = self.pending.pop(guild_id, None)
+        if batch:
+            await self.send(batch)
+
+    async def send(self, batch):
+        channel = batch[0][0]
+        embeds = [embed for _, embed, _ in batch]
+        pings = list(dict.fromkeys(ping for _, _, ping in batch if ping))
+        try:
+            await channel.send(content=" ".join(pings) or None, embeds=embeds)
+        except discord.Forbidden:
+            self.lost += 1
+            print(f"❌ Missing permissions to send logs in the log channel ({len(embeds)} entries dropped).")
+        except Exception as e:
+            self.lost += 1
+            print(f"⚠️ Failed to send log ({len(embeds)} entries dropped): {e}")
+
+_batcher = LogBatcher()
 
 async def log_action(
     bot,
@@ -33,12 +108,5 @@ async def log_action(
     if user:
         embed.set_footer(text=f"{user.name}#{user.discriminator}", icon_url=user.display_avatar.url)
 
-    try:
-        if ping:
-            await log_channel.send(content=ping, embed=embed)
-        else:
-            await log_channel.send(embed=embed)
-    except discord.Forbidden:
-        print("❌ Missing permissions to send logs in the log channel.")
-    except Exception as e:
-        print(f"⚠️ Failed to send log: {e}")
+    # ✅ Queued, several events share one message in the log channel
+    _batcher.add(guild.id, log_channel, embed, ping)
@@ -0,0 +1,113 @@
+from collections import deque
+
+SHINGLE_SIZE = 4     # characters per shingle
+MAX_CHARS = 300      # longer messages are only fingerprinted on their start
+BINS = 16            # signature length
+ROWS_PER_BAND = 4    # BINS / ROWS_PER_BAND LSH buckets per message
+EMPTY_BIN = -1
+MAX_BUCKET = 32      # entries compared per LSH bucket; the oldest is dropped past this
+
+def signature(text: str):
+    """One-permutation MinHash of the text's character shingles.
+
+    Each shingle is hashed once and only lowers the minimum of its own bin, so
+    the cost is one pass over the text instead of one pass per hash function.
+    """
+    text = " ".join(text[:MAX_CHARS].split())
+    if len(text) < SHINGLE_SIZE:
+        return None
+
+    sig = [None] * BINS
+    for i in range(len(text) - SHINGLE_SIZE + 1):
+        h = hash(text[i:i + SHINGLE_SIZE]) & 0xFFFFFFFFFFFFFFFF
+        b = h % BINS
+        value = h // BINS
+        current = sig[b]
+        if current is None or value < current:
+            sig[b] = value
+    return tuple(EMPTY_BIN if v is None else v for v in sig)
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    same = sum(1 for x, y in zip(a, b) if x == y and x != EMPTY_BIN)
+    filled = sum(1 for x, y in zip(a, b) if x != EMPTY_BIN or y != EMPTY_BIN)
+    return same / filled if filled else 0.0
+
+def band_keys(sig):
+    return [(i, sig[i:i + ROWS_PER_BAND]) for i in range(0, BINS, ROWS_PER_BAND)]
+
+class Fingerprint:
+    __slots__ = ("id", "time", "sig", "author_id", "payload", "flagged")
+
+    def __init__(self, entry_id, now, sig, author_id, payload):
+        self.id = entry_id
+        self.time = now
+        self.sig = sig
+        self.author_id = author_id
+        self.payload = payload
+        self.flagged = False
+
+class NearDuplicateIndex:
+    """Rolling LSH index of recent message fingerprints for one guild.
+
+    Entries older than `window` seconds fall off the front, and the total is
+    capped at `max_entries`. Each bucket keeps at most `bucket_size` entries,
+    so an insert compares against at most bands * bucket_size fingerprints
+    however large the index grows during a raid.
+    """
+
+    def __init__(self, window=60, threshold=0.7, max_entries=2000, bucket_size=MAX_BUCKET):
+        self.window = window
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bucket_size = bucket_size
+        self.entries = deque()  # time-ordered Fingerprints
+        self.buckets = {}       # band key -> {entry_id: Fingerprint}
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def expire(self, now: float):
+        while self.entries and (now - self.entries[0].time > self.window or len(self.entries) > self.max_entries):
+            old = self.entries.popleft()
+            for key in band_keys(old.sig):
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.pop(old.id, None)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def add(self, now: float, sig, author_id: int, payload):
+        """Insert a fingerprint and return it with its recent near-duplicates (its cluster).
+
+        If one of them is already flagged only that one is returned: the text is
+        a known raid, so there is nothing left to gather.
+        """
+        self.expire(now)
+
+        entry = Fingerprint(self.next_id, now, sig, author_id, payload)
+        self.next_id += 1
+        keys = band_keys(sig)
+
+        cluster = {}
+        for key in keys:
+            for other in self.buckets.get(key, {}).values():
+                if other.id in cluster or similarity(sig, other.sig) < self.threshold:
+                    continue
+                if other.flagged:
+                    cluster = {other.id: other}
+                    break
+                cluster[other.id] = other
+            else:
+                continue
+            break
+
+        for key in keys:
+            bucket = self.buckets.setdefault(key, {})
+            if len(bucket) >= self.bucket_size:
+                del bucket[next(iter(bucket))]  # oldest first; it stays reachable through its other bands
+            bucket[entry.id] = entry
+
+        self.entries.append(entry)
+        return entry, list(cluster.values())
@@ -0,0 +1,101 @@
+import discord
+
+from utils.deletion_queue import get_deletion_queue
+from utils.text_normalize import normalize
+
+# Lower runs first. Spam tracking sees every message before any other stage can delete it.
+STAGE_ORDER = {
+    "spam_filter": 10,
+    "bad_word_filter": 20,
+    "link_filter": 30,
+    "sticky_system": 40,
+    "auto_thread": 50,
+}
+
+class MessageContext:
+    """Shared per-message state handed to every moderation stage."""
+
+    def __init__(self, message: discord.Message, deletion_queue=None):
+        self.message = message
+        self.deletion_queue = deletion_queue
+        self.content = message.content
+        self.deleted = False
+        self._lowered = None
+        self._normalized = None
+
+    @property
+    def lowered(self):
+        if self._lowered is None:
+            self._lowered = self.content.lower()
+        return self._lowered
+
+    @property
+    def normalized(self):
+        """Confusable/leetspeak-folded content used by the word filter."""
+        if self._normalized is None:
+            self._normalized = normalize(self.content)
+        return self._normalized
+
+    async def delete(self) -> bool:
+        """Delete the message once. Later stages are skipped after this succeeds.
+
+        Deletions go through the shared per-channel queue, so a burst of
+        offending messages costs one bulk-delete call instead of one call each.
+        Returns only after the delete went through (True) or failed (False),
+        so callers can log it as done.
+        """
+        if self.deleted:
+            return True
+
+        message = self.message
+        if not message.channel.permissions_for(message.guild.me).manage_messages:
+            return False
+
+        if self.deletion_queue is None:
+            try:
+                await message.delete()
+            except discord.NotFound:
+                pass
+            except (discord.Forbidden, discord.HTTPException) as e:
+                print(f"⚠️ Failed to delete message {message.id}: {e}")
+                return False
+        elif not await self.deletion_queue.delete(message):
+            return False
+
+        self.deleted = True
+        return True
+
+class MessagePipeline:
+    def __init__(self, bot):
+        self.bot = bot
+        self.stages = []  # [(order, name, callback)]
+
+    def register(self, name: str, callback):
+        self.unregister(name)
+        self.stages.append((STAGE_ORDER.get(name, 100), name, callback))
+        self.stages.sort(key=lambda stage: stage[0])
+
+    def unregister(self, name: str):
+        self.stages = [stage for stage in self.stages if stage[1] != name]
+
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or not message.guild:
+            return
+
+        ctx = MessageContext(message, get_deletion_queue(self.bot))
+        for _, name, callback in self.stages:
+            if ctx.deleted:
+                break
+            try:
+                await callback(ctx)
+            except Exception as e:
+                print(f"⚠️ Moderation stage '{name}' failed: {e}")
+
+def get_pipeline(bot) -> MessagePipeline:
+    """Return the bot's message pipeline, creating its single on_message listener on first use."""
+    pipeline = getattr(bot, "message_pipeline", None)
+    if pipeline is None:
+        pipeline = MessagePipeline(bot)
+        bot.message_pipeline = pipeline
+        bot.add_listener(pipeline.on_message, "on_message")
+    return pipeline
@@ -0,0 +1,15 @@
+def id_set(values) -> frozenset:
+    """Frozen set of int ids from a settings list, which may hold str or int ids."""
+    ids = set()
+    for value in values or ():
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            print(f"⚠️ Ignoring invalid id in settings: {value!r}")
+    return frozenset(ids)
+
+def has_any_role(member, role_ids: frozenset) -> bool:
+    """True if the member holds one of `role_ids`; one set probe per role, no string conversion."""
+    if not role_ids:
+        return False
+    return any(role.id in role_ids for role in getattr(member, "roles", ()))
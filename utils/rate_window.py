@@ -0,0 +1,22 @@
+class RateWindow:
+    """Sliding "N events in T seconds" check on a fixed-size ring buffer.
+
+    The buffer keeps the last N timestamps; recording an event is one slot
+    write and one comparison, whatever the traffic.
+    """
+
+    __slots__ = ("stamps", "index")
+
+    def __init__(self, limit: int):
+        self.stamps = [float("-inf")] * limit
+        self.index = 0
+
+    def __len__(self):
+        return len(self.stamps)
+
+    def hit(self, now: float, per: float) -> bool:
+        """Record an event at `now`. True if the last N events all fell within `per` seconds."""
+        stamps = self.stamps
+        stamps[self.index] = now
+        self.index = (self.index + 1) % len(stamps)
+        return now - stamps[self.index] <= per
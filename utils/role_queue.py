@@ -0,0 +1,156 @@
+import discord
+import asyncio
+from collections import Counter
+
+BATCH_WINDOW = 1.0      # seconds to gather role changes per member
+GUILD_CONCURRENCY = 2   # role edits in flight per guild; they share one rate-limit bucket
+MAX_RETRIES = 3         # server errors only; discord.py already waits out 429s itself
+RETRY_BASE_DELAY = 2.0  # seconds, doubled on each retry
+
+class RoleQueue:
+    """Merges role changes for a member into as few REST calls as possible per window.
+
+    Every source (auto roles, verify, tickets, VC roles) queues its adds and
+    removes here. Changes for the same member within BATCH_WINDOW are merged,
+    later requests winning over earlier ones for the same role. A single net
+    change uses the per-role endpoint; several are applied with one
+    member.edit(roles=...) built from a freshly fetched member. Callers await
+    the outcome, so Forbidden and other errors still reach them.
+    """
+
+    def __init__(self, window: float = BATCH_WINDOW, concurrency: int = GUILD_CONCURRENCY):
+        self.window = window
+        self.concurrency = concurrency
+        self.pending = {}     # (guild_id, member_id): batch dict
+        self.timers = {}      # (guild_id, member_id): flush task
+        self.running = {}     # (guild_id, member_id): flush task in progress, so batches apply in order
+        self.semaphores = {}  # guild_id: asyncio.Semaphore
+        self.requested = Counter()  # source: requests
+        self.rest_calls = 0
+        self.retries = 0
+        self.failed = 0
+
+    async def apply(self, member: discord.Member, add=(), remove=(), source: str = "other", reason: str = None):
+        """Queue role changes for a member and wait until they are applied.
+
+        Raises whatever Discord raised for the merged request (e.g. Forbidden).
+        """
+        return await self.submit(member, add, remove, source, reason)
+
+    def submit(self, member: discord.Member, add=(), remove=(), source: str = "other", reason: str = None) -> asyncio.Future:
+        """Queue role changes right away and return a future for the outcome.
+
+        The changes are merged before this returns, so a remove submitted while
+        an add for the same role is still pending cancels it without a REST call.
+        """
+        key = (member.guild.id, member.id)
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = {"member": member, "add": {}, "remove": {}, "reasons": [], "futures": []}
+
+        for role in add:
+            batch["remove"].pop(role.id, None)
+            batch["add"][role.id] = role
+        for role in remove:
+            batch["add"].pop(role.id, None)
+            batch["remove"][role.id] = role
+        if reason and reason not in batch["reasons"]:
+            batch["reasons"].append(reason)
+        self.requested[source] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        batch["futures"].append(future)
+        if key not in self.timers:
+            self.timers[key] = asyncio.create_task(self._flush_later(key))
+        return future
+
+    async def _flush_later(self, key):
+        await asyncio.sleep(self.window)
+        self.timers.pop(key, None)
+        await self.flush(key)
+
+    async def flush(self, key):
+        batch = self.pending.pop(key, None)
+        if not batch:
+            return
+
+        previous = self.running.get(key)
+        task = self.running[key] = asyncio.current_task()
+        try:
+            if previous is not None and not previous.done():
+                await asyncio.wait({previous})
+
+            semaphore = self.semaphores.setdefault(key[0], asyncio.Semaphore(self.concurrency))
+            async with semaphore:
+                try:
+                    await self._apply(batch)
+                except Exception as e:
+                    self.failed += 1
+                    for future in batch["futures"]:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+
+            for future in batch["futures"]:
+                if not future.done():
+                    future.set_result(True)
+        finally:
+            if self.running.get(key) is task:
+                del self.running[key]
+
+    async def _apply(self, batch):
+        member = batch["member"]
+        member = member.guild.get_member(member.id) or member
+        reason = "; ".join(batch["reasons"]) or None
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                await self._apply_once(member, batch, reason)
+                return
+            except discord.HTTPException as e:
+                if e.status >= 500 and attempt < MAX_RETRIES:
+                    self.retries += 1
+                    await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+                    continue
+                raise
+
+    async def _apply_once(self, member: discord.Member, batch, reason: str):
+        add, remove = self._delta(member, batch)
+        if not add and not remove:
+            return
+
+        # A single change uses the per-role endpoint, which can't clobber anyone else's edits
+        if len(add) + len(remove) == 1:
+            self.rest_calls += 1
+            if add:
+                await member.add_roles(*add, reason=reason)
+            else:
+                await member.remove_roles(*remove, reason=reason)
+            return
+
+        # A full role list replaces whatever is set, so build it from a fresh copy of the
+        # member; the cache may not have seen another bot's or a moderator's change yet
+        self.rest_calls += 1
+        member = await member.guild.fetch_member(member.id)
+        add, remove = self._delta(member, batch)
+        if not add and not remove:
+            return
+        roles = [role for role in member.roles if not role.is_default() and role.id not in batch["remove"]] + add
+        self.rest_calls += 1
+        await member.edit(roles=roles, reason=reason)
+
+    def _delta(self, member: discord.Member, batch):
+        current = {role.id for role in member.roles}
+        add = [role for role_id, role in batch["add"].items() if role_id not in current]
+        remove = [role for role_id, role in batch["remove"].items() if role_id in current]
+        return add, remove
+
+    def stats(self):
+        return {
+            "requested": sum(self.requested.values()),
+            "by_source": dict(self.requested),
+            "rest_calls": self.rest_calls,
+            "retries": self.retries,
+            "failed": self.failed,
+        }
+
+role_queue = RoleQueue()
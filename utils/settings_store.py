@@ -0,0 +1,228 @@
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+
+WRITE_DELAY = 1.0           # seconds; a burst of saves to one file becomes a single write
+MTIME_CHECK_INTERVAL = 2.0  # seconds between checks for edits made outside the bot
+WRITE_RETRY_DELAY = 10.0    # seconds before a failed write is tried again
+
+def atomic_write(path: str, text: str) -> int:
+    """Write to a temp file in the same directory, fsync, then rename over the target.
+
+    Returns the new file's mtime so the store doesn't mistake its own write
+    for an outside edit.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return os.stat(path).st_mtime_ns
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class SettingsStore:
+    """Shared in-memory cache of every JSON settings file.
+
+    Reads hit disk once per file. Saves update the cache immediately and are
+    written behind, off the event loop, with an atomic rename so a crash can
+    never leave a half-written file. Edits made outside the bot are picked up
+    by a throttled mtime check on load. Reloading from disk updates the cached
+    object in place, so cogs holding a reference see the new values; cogs that
+    derive state from a file (compiled matchers, indexes) subscribe to it.
+    """
+
+    def __init__(self, write_delay: float = WRITE_DELAY):
+        self.write_delay = write_delay
+        self.cache = {}      # path: parsed data
+        self.defaults = {}   # path: default used when the file is missing or broken
+        self.dirty = set()
+        self.listeners = {}  # path: [callback(data)]
+        self.mtimes = {}     # path: st_mtime_ns of the version in the cache
+        self.checked = {}    # path: monotonic time of the last mtime check
+        self.writing = set()  # paths with a write in flight
+        self.reads = Counter()   # disk reads per path
+        self.writes = Counter()  # disk writes per path
+        self._flush_task = None
+        self._write_lock = asyncio.Lock()  # keeps two writes of one file from racing
+
+    def _read(self, path: str):
+        """Parse a file from disk. Raises ValueError if it is broken or the wrong shape."""
+        default = self.defaults.get(path)
+        try:
+            self.mtimes[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return copy.deepcopy(default), True
+        self.reads[path] += 1
+        with open(path, "r") as f:
+            data = json.load(f)  # JSONDecodeError is a ValueError
+        if default is not None and type(data) is not type(default):
+            raise ValueError(f"expected a JSON {type(default).__name__}, got {type(data).__name__}")
+        return data, False
+
+    def load(self, path: str, default=None):
+        """Return the cached data for a file, reading it from disk the first time."""
+        if path in self.cache:
+            now = time.monotonic()
+            if now - self.checked.get(path, 0) >= MTIME_CHECK_INTERVAL:
+                self.checked[path] = now
+                self.refresh_if_changed(path)
+            return self.cache[path]
+
+        self.defaults.setdefault(path, default if default is not None else {})
+        try:
+            data, missing = self._read(path)
+        except ValueError as e:
+            print(f"⚠️ Could not parse {path}, using defaults: {e}")
+            data, missing = copy.deepcopy(self.defaults[path]), False
+        self.cache[path] = data
+        self.checked[path] = time.monotonic()
+        if missing:
+            self._mark_dirty(path)  # create the file with its defaults
+        return data
+
+    def save(self, path: str, data=None):
+        """Replace (or re-store after mutating) a file's data and schedule a write."""
+        if data is not None:
+            self.cache[path] = data
+        self._mark_dirty(path)
+
+    def reload(self, path: str) -> bool:
+        """Re-read one file from disk and notify subscribers. Returns whether it was applied.
+
+        A file that is missing or fails to parse or validate is ignored and
+        the current settings stay in place, so a bad push can't wipe a cog's
+        config.
+        """
+        current = self.cache.get(path)
+        try:
+            data, missing = self._read(path)
+        except ValueError as e:
+            print(f"⚠️ Ignoring invalid {path}, keeping current settings: {e}")
+            return False
+        if missing:
+            return False  # a deleted file is recreated from the cache on the next save
+        if isinstance(current, dict) and isinstance(data, dict):
+            current.clear()
+            current.update(data)
+        elif isinstance(current, list) and isinstance(data, list):
+            current[:] = data
+        else:
+            self.cache[path] = data
+        self._notify(path)
+        return True
+
+    def refresh_if_changed(self, path: str) -> bool:
+        """Reload a file if it changed on disk since we last read or wrote it."""
+        if path in self.dirty or path in self.writing:
+            return False  # our own pending write wins
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.mtimes.get(path):
+            return False
+        return self.reload(path)
+
+    def evict(self, path: str) -> bool:
+        """Drop a file from memory. Files with unsaved changes are kept until written."""
+        if path in self.dirty or path in self.writing:
+            return False
+        for table in (self.cache, self.defaults, self.mtimes, self.checked):
+            table.pop(path, None)
+        return True
+
+    def reload_all(self):
+        for path in list(self.cache):
+            if path in self.dirty or path in self.writing:
+                print(f"⚠️ Not reloading {path}: it has changes that aren't on disk yet")
+                continue
+            self.reload(path)
+
+    def subscribe(self, path: str, callback):
+        """Call `callback(data)` whenever the file is reloaded from disk."""
+        self.listeners.setdefault(path, []).append(callback)
+
+    def unsubscribe(self, path: str, callback):
+        if callback in self.listeners.get(path, []):
+            self.listeners[path].remove(callback)
+
+    def _notify(self, path: str):
+        for callback in list(self.listeners.get(path, [])):
+            try:
+                callback(self.cache[path])
+            except Exception as e:
+                print(f"⚠️ Settings listener for {path} failed: {e}")
+
+    def _mark_dirty(self, path: str):
+        self.dirty.add(path)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.write_delay)
+        await self.flush()
+        while self.dirty:  # failed writes stay dirty until one succeeds
+            await asyncio.sleep(WRITE_RETRY_DELAY)
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write every dirty file. JSON is serialized here, the disk I/O runs in a thread.
+
+        A file that fails to write stays dirty, so it is retried and outside
+        edits can't replace the unsaved changes meanwhile. Returns whether
+        everything was written.
+        """
+        async with self._write_lock:
+            paths, self.dirty = self.dirty, set()
+            failed = set()
+            for path in paths:
+                text = json.dumps(self.cache[path], indent=4)
+                self.writing.add(path)
+                try:
+                    self.mtimes[path] = await asyncio.to_thread(atomic_write, path, text)
+                    self.writes[path] += 1
+                except OSError as e:
+                    failed.add(path)
+                    print(f"❌ Failed to write {path}, will retry: {e}")
+                finally:
+                    self.writing.discard(path)
+            self.dirty |= failed
+            return not failed
+
+    def flush_sync(self) -> bool:
+        paths, self.dirty = self.dirty, set()
+        failed = set()
+        for path in paths:
+            try:
+                self.mtimes[path] = atomic_write(path, json.dumps(self.cache[path], indent=4))
+                self.writes[path] += 1
+            except OSError as e:
+                failed.add(path)
+                print(f"❌ Failed to write {path}: {e}")
+        self.dirty |= failed
+        return not failed
+
+    def stats(self):
+        """Disk reads and writes per file; reads should stay flat once the bot is warm."""
+        return {
+            path: {"reads": self.reads[path], "writes": self.writes[path]}
+            for path in sorted(self.cache)
+        }
+
+settings_store = SettingsStore()
@@ -0,0 +1,140 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+
+from utils.guild_config import GUILD_DIR
+from utils.settings_store import settings_store
+
+WATCH_DIR = "data/settings"
+POLL_INTERVAL = 1.0  # seconds, only used when inotify is unavailable
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+# Files written in place end with CLOSE_WRITE; atomic writes end with MOVED_TO
+FILE_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO
+
+def open_inotify():
+    """Return (libc, non-blocking inotify fd), or None where inotify isn't available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        return libc, fd
+    except (OSError, AttributeError):
+        return None
+
+class SettingsWatcher:
+    """Reloads a settings file as soon as it changes on disk.
+
+    Uses inotify where available: one watch on the settings directory, one on
+    the per-guild root for new guild folders, and one per guild folder
+    (data/guilds/<id>/). Otherwise it polls the mtime of every cached file
+    once a second. Either way only the file that changed is re-read; the
+    store skips the bot's own writes.
+    """
+
+    def __init__(self, store, directory: str = WATCH_DIR, guild_dir: str = GUILD_DIR,
+                 poll_interval: float = POLL_INTERVAL):
+        self.store = store
+        self.directory = directory
+        self.guild_dir = guild_dir
+        self.poll_interval = poll_interval
+        self.libc = None
+        self.fd = None
+        self.watches = {}  # watch descriptor: directory
+        self.task = None
+        self.mode = "stopped"
+
+    def start(self):
+        if self.mode != "stopped":
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        os.makedirs(self.guild_dir, exist_ok=True)
+        inotify = open_inotify()
+        if inotify is not None:
+            self.libc, self.fd = inotify
+            ok = self._add_watch(self.directory, FILE_EVENTS) and self._add_watch(self.guild_dir, IN_CREATE | IN_MOVED_TO)
+            for entry in os.scandir(self.guild_dir) if ok else ():
+                if entry.is_dir():
+                    ok = self._add_watch(entry.path, FILE_EVENTS) and ok
+            if not ok:
+                os.close(self.fd)
+                self.fd = None
+                self.watches.clear()
+
+        if self.fd is not None:
+            asyncio.get_running_loop().add_reader(self.fd, self._on_events)
+            self.mode = "inotify"
+        else:
+            self.task = asyncio.create_task(self._poll())
+            self.mode = "polling"
+        print(f"👀 Watching {self.directory} and {self.guild_dir} for settings changes ({self.mode})")
+
+    def _add_watch(self, directory: str, mask: int) -> bool:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            print(f"⚠️ Could not watch {directory} (errno {ctypes.get_errno()})")
+            return False
+        self.watches[wd] = directory
+        return True
+
+    def stop(self):
+        if self.fd is not None:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+            self.watches.clear()
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.mode = "stopped"
+
+    def refresh(self, path: str):
+        if path in self.store.cache and self.store.refresh_if_changed(path):
+            print(f"🔁 Reloaded {path}")
+
+    def _on_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            start = offset + EVENT_HEADER.size
+            name = data[start:start + length].rstrip(b"\0")
+            offset = start + length
+            directory = self.watches.get(wd)
+            if not name or directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if directory == self.guild_dir:
+                    self._add_watch(path, FILE_EVENTS)  # a guild seen for the first time
+            else:
+                changed.add(path)
+
+        for path in changed:
+            self.refresh(path)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for path in list(self.store.cache):
+                self.refresh(path)
+
+settings_watcher = SettingsWatcher(settings_store)
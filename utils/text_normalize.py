@@ -0,0 +1,133 @@
+import re
+import unicodedata
+
+# Characters that render as nothing and are used to split words invisibly
+ZERO_WIDTH = "\u00ad\u180e\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff"
+
+# Cyrillic / Greek letters that look like Latin ones
+CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j",
+    "ѕ": "s", "ԁ": "d", "ԛ": "q", "ԝ": "w", "ɡ": "g",
+    "α": "a", "β": "b", "ε": "e", "η": "n", "ι": "i", "κ": "k", "ν": "v", "ο": "o",
+    "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+}
+
+LEETSPEAK = {
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b",
+    "@": "a", "$": "s", "!": "i", "|": "l", "+": "t",
+}
+
+# Unicode blocks whose compatibility decomposition is a plain ASCII letter or digit
+FOLD_RANGES = [
+    (0x00C0, 0x024F),    # Latin-1 supplement and Latin extended (accents)
+    (0x1E00, 0x1EFF),    # Latin extended additional
+    (0x2070, 0x209F),    # superscripts and subscripts
+    (0x2100, 0x214F),    # letterlike symbols
+    (0x2460, 0x24FF),    # enclosed alphanumerics
+    (0xFB00, 0xFB06),    # latin ligatures
+    (0xFF01, 0xFF5E),    # fullwidth forms
+    (0x1D400, 0x1D7FF),  # mathematical alphanumerics
+]
+
+SPACED_LETTERS_REGEX = re.compile(r"(?<!\w)(?:\w[^\w\n]{1,3}){2,}\w(?!\w)")
+REPEAT_REGEX = re.compile(r"(.)\1\1+")
+
+def _ascii_fold(ch: str):
+    decomposed = unicodedata.normalize("NFKD", ch)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    if stripped and len(stripped) <= 3 and stripped.isascii() and stripped.isalnum():
+        return stripped
+    return None
+
+def _build_fold_table():
+    table = {}
+    for start, end in FOLD_RANGES:
+        for cp in range(start, end + 1):
+            folded = _ascii_fold(chr(cp))
+            if folded:
+                table[cp] = folded
+
+    for ch, latin in CONFUSABLES.items():
+        table[ord(ch)] = latin
+        upper = ch.upper()
+        if len(upper) == 1 and upper != ch:
+            table[ord(upper)] = latin
+
+    for ch in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        table[ord(ch)] = ch.lower()
+    for ch, latin in LEETSPEAK.items():
+        table[ord(ch)] = latin
+    for ch in ZERO_WIDTH:
+        table[ord(ch)] = None
+    return table
+
+def _build_ascii_table(table):
+    ascii_table = bytearray(range(256))
+    for cp in range(128):
+        if table.get(cp):
+            ascii_table[cp] = ord(table[cp])
+    return bytes(ascii_table)
+
+# ✅ Built once at import, every message only pays for one translate call
+FOLD_TABLE = _build_fold_table()
+ASCII_FOLD_TABLE = _build_ascii_table(FOLD_TABLE)  # bytes.translate fast path for plain ASCII
+
+def _spaced_keep(match):
+    return [i for i in range(match.start(), match.end()) if match.string[i].isalnum() or match.string[i] == "_"]
+
+def _repeat_keep(match):
+    return [match.start(), match.start() + 1]
+
+def _fold(text: str) -> str:
+    if text.isascii():
+        return text.encode("ascii").translate(ASCII_FOLD_TABLE).decode("ascii")
+    return text.translate(FOLD_TABLE)
+
+def _squash(regex, keep, text: str) -> str:
+    return regex.sub(lambda m: "".join(m.string[i] for i in keep(m)), text)
+
+def _squash_tracked(regex, keep, text: str, offsets):
+    chars = []
+    new_offsets = []
+    last = 0
+    for match in regex.finditer(text):
+        chars.append(text[last:match.start()])
+        new_offsets.extend(offsets[last:match.start()])
+        for i in keep(match):
+            chars.append(text[i])
+            new_offsets.append(offsets[i])
+        last = match.end()
+    chars.append(text[last:])
+    new_offsets.extend(offsets[last:])
+    return "".join(chars), new_offsets
+
+def normalize(text: str) -> str:
+    """Join s p a c e d letters, fold confusables/leetspeak, drop zero-width chars, cap repeats at two."""
+    text = _squash(SPACED_LETTERS_REGEX, _spaced_keep, text)
+    text = _fold(text)
+    return _squash(REPEAT_REGEX, _repeat_keep, text)
+
+def normalize_with_offsets(text: str):
+    """Same output as normalize(), plus the original index of every normalized character.
+
+    Much slower than normalize(); only used once a match needs to be shown in a log.
+    """
+    joined, joined_offsets = _squash_tracked(SPACED_LETTERS_REGEX, _spaced_keep, text, list(range(len(text))))
+
+    chars = []
+    offsets = []
+    for ch, index in zip(joined, joined_offsets):
+        for folded in ch.translate(FOLD_TABLE):
+            chars.append(folded)
+            offsets.append(index)
+
+    return _squash_tracked(REPEAT_REGEX, _repeat_keep, "".join(chars), offsets)
+
+def original_span(text: str, start: int, end: int, offsets=None) -> str:
+    """Map a [start, end) range of normalize(text) back to the original text."""
+    if offsets is None:
+        _, offsets = normalize_with_offsets(text)
+    if not offsets or start >= len(offsets) or end <= start:
+        return ""
+    return text[offsets[start]:offsets[min(end, len(offsets)) - 1] + 1]
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Dict-like store bounded by entry count, idle TTL and an approximate byte cap.
+
+    Entries are kept in least-recently-used order, so expired and overflowing
+    entries are always at the front and eviction never scans the whole store.
+    """
+
+    def __init__(self, max_entries=10000, ttl=600, max_bytes=None, sizeof=None, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict  # called as on_evict(key, value) when an entry expires or is evicted
+        self.data = OrderedDict()  # key -> [value, last_used, size]
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def configure(self, max_entries=None, ttl=None, max_bytes=None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if ttl is not None:
+            self.ttl = ttl
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        self.prune()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        entry = self.data.get(key)
+        if entry is None:
+            return default
+
+        now = time.monotonic()
+        if now - entry[1] > self.ttl:
+            self._drop(key, evicted=True)
+            self.expirations += 1
+            return default
+
+        entry[1] = now
+        self.data.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, value):
+        """Store (or re-store after mutating) a value and re-measure its size."""
+        size = self.sizeof(value) if self.sizeof else 0
+        entry = self.data.get(key)
+        if entry is not None:
+            self.bytes -= entry[2]
+        self.data[key] = [value, time.monotonic(), size]
+        self.data.move_to_end(key)
+        self.bytes += size
+        self.prune()
+
+    def pop(self, key, default=None):
+        entry = self.data.get(key)
+        if entry is None:
+            return default
+        self._drop(key)
+        return entry[0]
+
+    def prune(self):
+        """Drop idle entries, then least recently used ones until back under the caps."""
+        cutoff = time.monotonic() - self.ttl
+        while self.data:
+            key, entry = next(iter(self.data.items()))
+            if entry[1] < cutoff:
+                self._drop(key, evicted=True)
+                self.expirations += 1
+            elif len(self.data) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+                self._drop(key, evicted=True)
+                self.evictions += 1
+            else:
+                break
+
+    def _drop(self, key, evicted=False):
+        entry = self.data.pop(key)
+        self.bytes -= entry[2]
+        if evicted and self.on_evict:
+            self.on_evict(key, entry[0])
+
+    def stats(self):
+        return {
+            "entries": len(self.data),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bytes": self.bytes,
+        }
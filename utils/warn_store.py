@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DB_PATH = "data/warnings/warnings.db"
+LEGACY_JSON_PATH = "data/warnings/warn_data.json"
+LEGACY_GUILD_ID = 0  # warnings imported from the old JSON were never guild-scoped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator TEXT NOT NULL,
+    moderator_id INTEGER,
+    reason TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS warnings_member ON warnings (guild_id, user_id, created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class WarnStore:
+    """Guild-scoped warnings in SQLite (WAL mode).
+
+    Every query is served by the (guild_id, user_id, created_at) index, and
+    adding or removing a warning touches one row. Queries run in a worker
+    thread so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()  # one connection, used from worker threads
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    async def _run(self, func, *args):
+        def call():
+            with self.lock:
+                return func(*args)
+        return await asyncio.to_thread(call)
+
+    # ==== One-time import ====
+
+    def import_legacy_json(self, path: str = LEGACY_JSON_PATH) -> int:
+        """Copy warnings from the old warn_data.json once, then rename the file out of the way.
+
+        The old file was keyed by user id only, so imported rows get
+        LEGACY_GUILD_ID and keep showing up in every guild, as they did before.
+        """
+        if not os.path.exists(path):
+            return 0
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'").fetchone():
+                return 0
+            with open(path, "r") as f:
+                data = json.load(f)
+
+            rows = [
+                (LEGACY_GUILD_ID, int(user_id), warn.get("moderator", "Unknown"), warn.get("reason", ""), 0)
+                for user_id, warns in data.items()
+                for warn in warns
+            ]
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO warnings (guild_id, user_id, moderator, reason, created_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_json_imported', ?)", (str(time.time()),))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        os.replace(path, path + ".imported")
+        return len(rows)
+
+    # ==== Queries ====
+
+    def _add(self, guild_id, user_id, moderator, moderator_id, reason):
+        cursor = self.conn.execute(
+            "INSERT INTO warnings (guild_id, user_id, moderator, moderator_id, reason, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (guild_id, user_id, moderator, moderator_id, reason, time.time())
+        )
+        return cursor.lastrowid
+
+    def _filters(self, moderator_id, since, until):
+        clauses, params = [], []
+        if moderator_id is not None:
+            clauses.append("moderator_id = ?")
+            params.append(moderator_id)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def _page(self, guild_id, user_id, after, limit, moderator_id, since, until):
+        extra, params = self._filters(moderator_id, since, until)
+        if after is not None:
+            extra += " AND (created_at, id) > (?, ?)"
+            params += list(after)
+        # One index range scan per guild id, each stopping after `limit` rows,
+        # so a page costs the same however many warnings a member has
+        member_page = (
+            "SELECT * FROM (SELECT * FROM warnings WHERE guild_id = ? AND user_id = ?"
+            f"{extra} ORDER BY created_at, id LIMIT ?)"
+        )
+        return self.conn.execute(
+            f"{member_page} UNION ALL {member_page} ORDER BY created_at, id LIMIT ?",
+            (guild_id, user_id, *params, limit, LEGACY_GUILD_ID, user_id, *params, limit, limit)
+        ).fetchall()
+
+    def _count(self, guild_id, user_id, moderator_id, since, until):
+        extra, params = self._filters(moderator_id, since, until)
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM warnings WHERE guild_id IN (?, ?) AND user_id = ?{extra}",
+            (guild_id, LEGACY_GUILD_ID, user_id, *params)
+        ).fetchone()[0]
+
+    def _remove_nth(self, guild_id, user_id, number):
+        row = self.conn.execute(
+            "SELECT * FROM warnings WHERE guild_id IN (?, ?) AND user_id = ? ORDER BY created_at, id LIMIT 1 OFFSET ?",
+            (guild_id, LEGACY_GUILD_ID, user_id, number - 1)
+        ).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM warnings WHERE id = ?", (row["id"],))
+        return row
+
+    async def add(self, guild_id: int, user_id: int, moderator: str, moderator_id: int, reason: str) -> int:
+        return await self._run(self._add, guild_id, user_id, moderator, moderator_id, reason)
+
+    async def page(self, guild_id: int, user_id: int, after=None, limit: int = 10,
+                   moderator_id: int = None, since: float = None, until: float = None):
+        """Up to `limit` warnings oldest first, starting after the `(created_at, id)` cursor."""
+        return await self._run(self._page, guild_id, user_id, after, limit, moderator_id, since, until)
+
+    async def count(self, guild_id: int, user_id: int,
+                    moderator_id: int = None, since: float = None, until: float = None) -> int:
+        return await self._run(self._count, guild_id, user_id, moderator_id, since, until)
+
+    async def remove_nth(self, guild_id: int, user_id: int, number: int):
+        """Delete a member's `number`-th warning (1 = oldest). Returns the removed row or None."""
+        if number < 1:
+            return None
+        return await self._run(self._remove_nth, guild_id, user_id, number)
@@ -0,0 +1,75 @@
+import re
+
+REPEATS_REGEX = re.compile(r"(.)\1+")
+
+def collapse_repeats(text: str) -> str:
+    return REPEATS_REGEX.sub(r"\1", text)
+
+def build_trie(words):
+    root = {}
+    for word in words:
+        node = root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True  # end of word marker
+    return root
+
+def trie_to_pattern(node, allow_repeats=False) -> str:
+    """Turn a trie into one regex so shared prefixes are only tried once per position."""
+    repeat = "+" if allow_repeats else ""
+    branches = [
+        re.escape(ch) + repeat + trie_to_pattern(child, allow_repeats)
+        for ch, child in sorted(node.items()) if ch
+    ]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A shorter word ends here, longer words continue (greedy, so the longest wins)
+        body = "(?:" + body + ")?"
+    return body
+
+class WordMatcher:
+    """Matches a whole word list in one pass. Rebuild it whenever the list changes.
+
+    With allow_repeats every letter may be stretched ("fuuuck" matches "fuck").
+    """
+
+    def __init__(self, words, allow_repeats=False):
+        self.words = frozenset(word.lower() for word in words if word)
+        self.allow_repeats = allow_repeats
+        self.shapes = {}  # collapsed spelling -> listed word, to report stretched matches
+        for word in sorted(self.words):
+            self.shapes.setdefault(collapse_repeats(word), word)
+
+        self.pattern = None
+        if self.words:
+            pattern = trie_to_pattern(build_trie(self.words), allow_repeats)
+            self.pattern = re.compile(pattern, re.IGNORECASE)
+
+    def __len__(self):
+        return len(self.words)
+
+    def search(self, text: str) -> bool:
+        if self.pattern is None:
+            return False
+        return self.pattern.search(text) is not None
+
+    def iter_matches(self, text: str):
+        """Yield (word, start, end) for every match in the text."""
+        if self.pattern is None:
+            return
+        for match in self.pattern.finditer(text):
+            word = match.group().lower()
+            if self.allow_repeats:
+                word = self.shapes.get(collapse_repeats(word), word)
+            yield word, match.start(), match.end()
+
+    def find_all(self, text: str):
+        """Return every listed word found in the text, in order of first appearance."""
+        found = []
+        for word, _, _ in self.iter_matches(text):
+            if word not in found:
+                found.append(word)
+        return found